@@ -1,23 +1,70 @@
 from flask import Flask
 from flask_cors import CORS
-from flasgger import Swagger
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 from models import db
 from routes import init_routes
 from config import Config
+from helpers import (
+    principals,
+    revocations,
+    roles,
+    passwords,
+    init_instrumentation,
+    JSONProvider,
+    init_pool,
+    init_engine_events,
+    article_cache,
+    compression,
+    init_serving,
+    replicas,
+    rate_limiter,
+    admission,
+)
 
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
     app.config.from_object(Config)
+    if config:
+        app.config.from_mapping(config)
+    init_serving(app)
+    if app.config["PROXY_COUNT"]:
+        # Client IPs (for rate limits) come from the proxies' X-Forwarded-For.
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["PROXY_COUNT"])
+    app.json = JSONProvider(app)
+    init_pool(app)
     db.init_app(app)
+    init_engine_events(app)
+    replicas.init_app(app)
+    roles.init_app(app)
+    principals.init_app(app)
+    revocations.init_app(app)
+    passwords.init_app(app)
+    article_cache.init_app(app)
+    compression.init_app(app)
+    rate_limiter.init_app(app)
+    admission.init_app(app)
+    init_instrumentation(app)
     CORS(app)
-    Swagger(app, template_file="docs/swagger.yml")
+    if app.config["API_DOCS"] != "off":
+        # flasgger pulls in jsonschema; scripts and tests can skip both.
+        from helpers.docs import init_docs
+
+        init_docs(app)
     init_routes(app)
     return app
 
 
-app = create_app()
+def __getattr__(name):
+    # ``app`` is created on first access (gunicorn app:app, flask run), so
+    # importing create_app or db from here does not build a second app.
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    create_app().run(debug=True)
@@ -0,0 +1,322 @@
+"""Benchmarks for the API hot paths.
+
+Seeds a throwaway SQLite database (or --database-url) at each dataset size,
+drives the routes through the Flask test client and reports latency
+percentiles, throughput and SQL queries per request. Results are written as
+JSON; with --baseline the run fails if a scenario got slower than the
+tolerance allows or issues more queries than before.
+
+    python -m benchmarks.bench_api --sizes 1000,10000 --output bench.json
+    python -m benchmarks.bench_api --baseline bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-not-for-production")
+# Measure the routes, not the rate limiter turning the load away.
+os.environ.setdefault("RATELIMIT_ENABLED", "False")
+# Time the query paths, not article cache hits.
+os.environ.setdefault("ARTICLE_CACHE_BACKEND", "none")
+
+from sqlalchemy import select  # noqa: E402
+
+from app import create_app  # noqa: E402
+from helpers import count_queries, passwords, token_required  # noqa: E402
+from models import db, Article, Role, User  # noqa: E402
+from scripts.populate_db import (  # noqa: E402
+    create_roles,
+    generate_articles,
+    generate_users,
+)
+
+BENCH_USER = "bench_admin"
+BENCH_PASSWORD = "benchpass"
+
+# Hard ceilings on SQL statements per request, checked on every run.
+QUERY_BUDGETS = {
+    "articles_list": 2,
+    "articles_search": 2,
+    "article_get": 2,
+    "token_required": 1,
+    "users_list": 5,
+    "user_get": 3,
+    "user_create": 4,
+    "user_update": 5,
+    "user_delete": 5,
+}
+
+
+def seed(app, size, seed_value):
+    with app.app_context():
+        db.create_all()
+        create_roles()
+        admin = Role.query.filter_by(name="admin").first()
+        db.session.add(
+            User(
+                username=BENCH_USER,
+                password=passwords.hash(BENCH_PASSWORD),
+                role_id=admin.id,
+            )
+        )
+        db.session.commit()
+
+        rng = random.Random(seed_value)
+        users = max(1, size // 20)
+        generate_users(
+            users, rng, {"viewer": 9, "editor": 1}, "pass", "bench_user_", 5000
+        )
+        args = SimpleNamespace(
+            batch_size=5000,
+            author_skew=1.0,
+            content_mu=7.0,
+            content_sigma=0.8,
+            content_max=20_000,
+            copy=False,
+        )
+        generate_articles(size, rng, args)
+        article_ids = list(db.session.scalars(select(Article.id)))
+        word = db.session.scalar(select(Article.title).limit(1)).split()[0]
+    return article_ids, word
+
+
+def measure(counter, iterations, request):
+    latencies = []
+    queries = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        before = counter.count
+        t0 = time.perf_counter()
+        response = request(i)
+        latencies.append(time.perf_counter() - t0)
+        queries.append(counter.count - before)
+        if response.status_code >= 400:
+            raise RuntimeError(
+                f"benchmark request failed: {response.status_code} {response.get_data(as_text=True)}"
+            )
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(0.50), 3),
+        "p95_ms": round(percentile(0.95), 3),
+        "p99_ms": round(percentile(0.99), 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "rps": round(iterations / elapsed, 1),
+        "queries": max(queries),
+    }
+
+
+def run_size(size, args):
+    if args.database_url:
+        url = args.database_url
+    else:
+        fd, path = tempfile.mkstemp(suffix=".db", prefix=f"bench_{size}_")
+        os.close(fd)
+        url = f"sqlite:///{path}"
+    app = create_app({"SQLALCHEMY_DATABASE_URI": url})
+
+    @app.route("/_bench/plain")
+    def plain():
+        return "", 204
+
+    @app.route("/_bench/authenticated")
+    @token_required
+    def authenticated():
+        return "", 204
+
+    article_ids, word = seed(app, size, args.seed)
+    client = app.test_client()
+
+    # Requests must not share an outer app context, or they would also share
+    # one session and its identity map.
+    with app.app_context():
+        engine = db.engine
+    with count_queries() as counter:
+        results = run_scenarios(app, client, counter, article_ids, word, args)
+    engine.dispose()
+
+    if not args.database_url:
+        os.unlink(path)
+    return results
+
+
+def run_scenarios(app, client, counter, article_ids, word, args):
+    rng = random.Random(args.seed)
+    n = args.iterations
+    token = client.post(
+        "/login", json={"username": BENCH_USER, "password": BENCH_PASSWORD}
+    ).json["token"]
+    auth = {"Authorization": f"Bearer {token}"}
+    # Warm the principal cache so every scenario measures the steady state.
+    client.get("/_bench/authenticated", headers=auth)
+    results = {}
+
+    results["articles_list"] = measure(
+        counter, n, lambda i: client.get("/articles", headers=auth)
+    )
+    results["articles_search"] = measure(
+        counter, n, lambda i: client.get(f"/articles?q={word}", headers=auth)
+    )
+    results["article_get"] = measure(
+        counter,
+        n,
+        lambda i: client.get(f"/articles/{rng.choice(article_ids)}", headers=auth),
+    )
+    results["login"] = measure(
+        counter,
+        max(1, n // 10),
+        lambda i: client.post(
+            "/login", json={"username": BENCH_USER, "password": BENCH_PASSWORD}
+        ),
+    )
+
+    plain_result = measure(counter, n, lambda i: client.get("/_bench/plain"))
+    authenticated_result = measure(
+        counter, n, lambda i: client.get("/_bench/authenticated", headers=auth)
+    )
+    authenticated_result["overhead_p50_ms"] = round(
+        authenticated_result["p50_ms"] - plain_result["p50_ms"], 3
+    )
+    results["token_required"] = authenticated_result
+
+    results["users_list"] = measure(
+        counter, n, lambda i: client.get("/users", headers=auth)
+    )
+    created = max(1, n // 10)
+    results["user_create"] = measure(
+        counter,
+        created,
+        lambda i: client.post(
+            "/users",
+            json={"username": f"bench_crud_{i}", "password": "pass", "role": "viewer"},
+            headers=auth,
+        ),
+    )
+    with app.app_context():
+        crud_ids = list(
+            db.session.scalars(
+                select(User.id).where(User.username.like("bench_crud_%"))
+            )
+        )
+    results["user_get"] = measure(
+        counter,
+        n,
+        lambda i: client.get(f"/users/{crud_ids[i % len(crud_ids)]}", headers=auth),
+    )
+    results["user_update"] = measure(
+        counter,
+        len(crud_ids),
+        lambda i: client.put(
+            f"/users/{crud_ids[i]}",
+            json={"username": f"bench_crud_renamed_{i}"},
+            headers=auth,
+        ),
+    )
+    results["user_delete"] = measure(
+        counter,
+        len(crud_ids),
+        lambda i: client.delete(f"/users/{crud_ids[i]}", headers=auth),
+    )
+    return results
+
+
+def compare(results, baseline, tolerance):
+    failures = []
+    for size, scenarios in results.items():
+        for name, result in scenarios.items():
+            budget = QUERY_BUDGETS.get(name)
+            if budget is not None and result["queries"] > budget:
+                failures.append(
+                    f"{name}@{size}: {result['queries']} queries, budget is {budget}"
+                )
+            previous = baseline.get(size, {}).get(name) if baseline else None
+            if previous is None:
+                continue
+            if result["queries"] > previous["queries"]:
+                failures.append(
+                    f"{name}@{size}: {result['queries']} queries, baseline {previous['queries']}"
+                )
+            limit = previous["p95_ms"] * (1 + tolerance)
+            if result["p95_ms"] > limit:
+                failures.append(
+                    f"{name}@{size}: p95 {result['p95_ms']}ms exceeds {limit:.3f}ms "
+                    f"(baseline {previous['p95_ms']}ms + {tolerance:.0%})"
+                )
+    return failures
+
+
+def print_table(results):
+    print(f"{'scenario':<18}{'size':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rps':>10}{'queries':>9}")
+    for size, scenarios in results.items():
+        for name, r in scenarios.items():
+            print(
+                f"{name:<18}{size:>9}{r['p50_ms']:>10}{r['p95_ms']:>10}"
+                f"{r['p99_ms']:>10}{r['rps']:>10}{r['queries']:>9}"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the API hot paths.")
+    parser.add_argument(
+        "--sizes", default="1000,10000", help="Comma-separated article counts to seed."
+    )
+    parser.add_argument("--iterations", type=int, default=200, help="Requests per scenario.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the dataset.")
+    parser.add_argument(
+        "--database-url",
+        help="Run a single size against this empty database instead of a temporary SQLite file.",
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare against results from a previous run.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed relative p95 slowdown against the baseline.",
+    )
+    args = parser.parse_args(argv)
+
+    results = {}
+    for size in [int(s) for s in args.sizes.split(",")]:
+        print(f"Seeding and benchmarking {size} articles...")
+        results[str(size)] = run_size(size, args)
+
+    print_table(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "iterations": args.iterations,
+                    "seed": args.seed,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    failures = compare(results, baseline, args.tolerance)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""Concurrency benchmark: throughput of each gunicorn configuration.
+
+Starts the app under gunicorn with ``gunicorn.conf.py`` once per
+configuration, then drives the read routes with a growing number of
+concurrent clients and reports throughput and latency percentiles:
+
+- ``baseline``: one sync worker, what ``gunicorn app:app`` ran before the
+  config file existed;
+- ``sync``, ``gthread``, ``gevent``: that worker class with ``--workers``
+  processes (``--threads`` / ``--worker-connections`` each).
+
+The worker classes only differ when requests wait on I/O, so point
+--database-url at PostgreSQL (e.g. the docker-compose ``db`` service);
+against the default temporary SQLite file all of them are CPU bound.
+
+    python -m benchmarks.bench_concurrency --database-url postgresql://... \\
+        --modes baseline,gthread,gevent --concurrency 1,16,64 --duration 10
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-not-for-production")
+# Measure the routes, not the rate limiter turning the load away.
+os.environ.setdefault("RATELIMIT_ENABLED", "False")
+
+from app import create_app  # noqa: E402
+from benchmarks.bench_api import BENCH_PASSWORD, BENCH_USER, seed  # noqa: E402
+from models import db  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_FILE = os.path.join(ROOT, "gunicorn.conf.py")
+
+MODES = {
+    "baseline": {"GUNICORN_WORKER_CLASS": "sync", "GUNICORN_WORKERS": "1"},
+    "sync": {"GUNICORN_WORKER_CLASS": "sync"},
+    "gthread": {"GUNICORN_WORKER_CLASS": "gthread"},
+    "gevent": {"GUNICORN_WORKER_CLASS": "gevent"},
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def call(url, headers=None, data=None):
+    request = urllib.request.Request(url, data=data, headers=headers or {})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return response.status, response.read()
+
+
+def start_server(mode, url, port, args):
+    env = dict(
+        os.environ,
+        DATABASE_URL=url,
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        GUNICORN_WORKERS=str(args.workers),
+        GUNICORN_THREADS=str(args.threads),
+        GUNICORN_WORKER_CONNECTIONS=str(args.worker_connections),
+        GUNICORN_LOG_LEVEL="warning",
+    )
+    env.update(MODES[mode])
+    command = [sys.executable, "-m", "gunicorn", "-c", CONFIG_FILE, "app:app"]
+    server = subprocess.Popen(command, env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            call(f"http://127.0.0.1:{port}/apispec_1.json")
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"gunicorn ({mode}) did not start")
+
+
+def load(base, paths, headers, concurrency, duration):
+    latencies, errors = [], []
+    lock = threading.Lock()
+    stop = time.monotonic() + duration
+
+    def client(seed_value):
+        rng = random.Random(seed_value)
+        while time.monotonic() < stop:
+            t0 = time.perf_counter()
+            try:
+                call(base + rng.choice(paths), headers)
+            except OSError as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def percentile(p):
+        if not latencies:
+            return None
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 3)
+
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+    }
+
+
+def run_mode(mode, url, article_ids, args):
+    port = free_port()
+    server = start_server(mode, url, port, args)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        _, body = call(
+            f"{base}/login",
+            {"Content-Type": "application/json"},
+            json.dumps({"username": BENCH_USER, "password": BENCH_PASSWORD}).encode(),
+        )
+        headers = {"Authorization": f"Bearer {json.loads(body)['token']}"}
+        paths = ["/articles?limit=20"] + [f"/articles/{i}" for i in article_ids[:500]]
+        results = {}
+        for concurrency in args.concurrency:
+            print(f"  {mode}: {concurrency} concurrent clients...")
+            results[str(concurrency)] = load(base, paths, headers, concurrency, args.duration)
+        return results
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare gunicorn worker configurations.")
+    parser.add_argument("--database-url", help="Empty database to seed; defaults to a temporary SQLite file.")
+    parser.add_argument("--size", type=int, default=10000, help="Articles to seed.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--workers", type=int, default=2, help="gunicorn worker processes per mode (not baseline)."
+    )
+    parser.add_argument("--threads", type=int, default=4, help="Threads per gthread worker.")
+    parser.add_argument(
+        "--worker-connections", type=int, default=100, help="Concurrent requests per gevent worker."
+    )
+    parser.add_argument(
+        "--concurrency",
+        default="1,16,64",
+        type=lambda v: [int(c) for c in v.split(",")],
+        help="Comma-separated numbers of concurrent clients.",
+    )
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per step.")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    path = None
+    url = args.database_url
+    if url is None:
+        fd, path = tempfile.mkstemp(suffix=".db", prefix="bench_concurrency_")
+        os.close(fd)
+        url = f"sqlite:///{path}"
+    print(f"Seeding {args.size} articles...")
+    app = create_app({"SQLALCHEMY_DATABASE_URI": url})
+    article_ids, _ = seed(app, args.size, args.seed)
+    with app.app_context():
+        db.engine.dispose()
+
+    # Measure the database round trips, not article cache hits.
+    os.environ["ARTICLE_CACHE_BACKEND"] = "none"
+    results = {}
+    try:
+        for mode in args.modes.split(","):
+            results[mode] = run_mode(mode, url, article_ids, args)
+    finally:
+        if path:
+            os.unlink(path)
+
+    print(f"{'mode':<10}{'clients':>9}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for mode, steps in results.items():
+        for concurrency, r in steps.items():
+            print(
+                f"{mode:<10}{concurrency:>9}{r['rps']:>10}{r['p50_ms']!s:>10}"
+                f"{r['p95_ms']!s:>10}{r['p99_ms']!s:>10}{r['errors']:>8}"
+            )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Startup benchmark: import time, create_app time and the first docs request.
+
+Every sample runs in a fresh interpreter, because the import cache is the
+thing being measured. Scenarios:
+
+- ``import``: ``import app``, what gunicorn's master and alembic pay;
+- ``script``: import and ``create_app({"API_DOCS": "off"})``, as scripts do;
+- ``docs_<mode>_<spec>``: import and ``create_app`` with ``API_DOCS`` set to
+  ``lazy`` or ``eager`` and the spec read from the YAML source or the JSON
+  compiled by ``scripts.build_spec``, followed by one /apispec_1.json
+  request, which is when the lazy mode pays for the spec.
+
+Reports the median of --runs samples for each step and for the process as
+a whole (interpreter start up to exit).
+
+    python -m benchmarks.bench_startup --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMPILED_SPEC = os.path.join(ROOT, "docs", "swagger.json")
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+steps = {"import_ms": t1 - t0}
+config = json.loads(sys.argv[1])
+if config is not None:
+    application = app.create_app(config)
+    t2 = time.perf_counter()
+    steps["create_app_ms"] = t2 - t1
+    if config.get("API_DOCS") != "off":
+        assert application.test_client().get("/apispec_1.json").status_code == 200
+        steps["first_docs_request_ms"] = time.perf_counter() - t2
+print(json.dumps({k: v * 1000 for k, v in steps.items()}))
+"""
+
+SCENARIOS = {
+    "import": (None, None),
+    "script": ({"API_DOCS": "off"}, None),
+    "docs_eager_yaml": ({"API_DOCS": "eager"}, "yaml"),
+    "docs_lazy_yaml": ({"API_DOCS": "lazy"}, "yaml"),
+    "docs_eager_json": ({"API_DOCS": "eager"}, "json"),
+    "docs_lazy_json": ({"API_DOCS": "lazy"}, "json"),
+}
+
+
+def sample(config, env):
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE, json.dumps(config)],
+        cwd=ROOT,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    steps = json.loads(output.strip().splitlines()[-1])
+    steps["process_ms"] = (time.perf_counter() - started) * 1000
+    return steps
+
+
+def use_spec(spec):
+    if spec == "json":
+        from scripts.build_spec import build_spec
+
+        build_spec()
+    elif os.path.exists(COMPILED_SPEC):
+        os.unlink(COMPILED_SPEC)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure import and startup time.")
+    parser.add_argument("--runs", type=int, default=10, help="Fresh processes per scenario.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    fd, path = tempfile.mkstemp(suffix=".db", prefix="bench_startup_")
+    os.close(fd)
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{path}",
+        SECRET_KEY=os.getenv("SECRET_KEY", "benchmark-secret-key-not-for-production"),
+    )
+    # Leave a compiled spec the way we found it.
+    had_spec = os.path.exists(COMPILED_SPEC)
+    results = {}
+    try:
+        for name in args.scenarios.split(","):
+            config, spec = SCENARIOS[name]
+            use_spec(spec)
+            samples = [sample(config, env) for _ in range(args.runs)]
+            results[name] = {
+                step: round(statistics.median(s[step] for s in samples), 1)
+                for step in samples[0]
+            }
+            print(f"  {name}: {results[name]['process_ms']} ms")
+    finally:
+        os.unlink(path)
+        use_spec("json" if had_spec else None)
+
+    steps = ["import_ms", "create_app_ms", "first_docs_request_ms", "process_ms"]
+    print(f"{'scenario':<18}" + "".join(f"{s[:-3]:>22}" for s in steps))
+    for name, r in results.items():
+        print(f"{name:<18}" + "".join(f"{r.get(s, '-')!s:>22}" for s in steps))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,134 @@
 import os
 
 from dotenv import load_dotenv
+from sqlalchemy.pool import NullPool
 
 load_dotenv()
 
 
+def env_flag(name, default="False"):
+    return os.getenv(name, default).lower() in ("true", "1", "yes")
+
+
+def engine_options(url):
+    """SQLAlchemy engine options for PostgreSQL, tuned from the environment.
+
+    With DB_PGBOUNCER set, connections go through a PgBouncer in transaction
+    mode: SQLAlchemy keeps no pool of its own and the statement timeout is
+    applied per transaction (see helpers/pool.py) because PgBouncer rejects
+    startup options.
+    """
+    if not url or not url.startswith("postgres"):
+        return {}
+    if env_flag("DB_PGBOUNCER"):
+        return {"poolclass": NullPool}
+
+    options = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": env_flag("DB_POOL_PRE_PING", "True"),
+        "pool_use_lifo": env_flag("DB_POOL_USE_LIFO", "True"),
+    }
+    statement_timeout = os.getenv("DB_STATEMENT_TIMEOUT_MS")
+    if statement_timeout:
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={int(statement_timeout)}"
+        }
+    return options
+
+
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    # Comma-separated read replica URLs, bound as replica_0, replica_1, ...
+    DATABASE_REPLICA_URLS = [
+        url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+    ]
+    SQLALCHEMY_BINDS = {
+        f"replica_{i}": {"url": url, **engine_options(url)}
+        for i, url in enumerate(DATABASE_REPLICA_URLS)
+    }
+    REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+    REPLICA_HEALTH_INTERVAL = float(os.getenv("REPLICA_HEALTH_INTERVAL", "5"))
+    REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", "10"))
+    # Unsafe endpoints that change no data read from replicas, so they do not
+    # pin readers to the primary or hold off the article cache.
+    REPLICA_WRITE_EXEMPT = os.getenv(
+        "REPLICA_WRITE_EXEMPT", "auth.login,auth.signup,auth.refresh,auth.logout"
+    ).split(",")
+    DB_PGBOUNCER = env_flag("DB_PGBOUNCER")
+    DB_STATEMENT_TIMEOUT_MS = os.getenv("DB_STATEMENT_TIMEOUT_MS")
     SECRET_KEY = os.getenv("SECRET_KEY")
-    SQLALCHEMY_TRACK_MODIFICATIONS = os.getenv(
-        "SQLALCHEMY_TRACK_MODIFICATIONS", "False"
-    ).lower() in ("true", "1", "yes")
+    SQLALCHEMY_TRACK_MODIFICATIONS = env_flag("SQLALCHEMY_TRACK_MODIFICATIONS")
+    PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "50"))
+    PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "100"))
+    SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto")
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+    PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+    # Per-worker copies, which other workers' invalidations do not reach.
+    PRINCIPAL_CACHE_LOCAL_TTL = int(os.getenv("PRINCIPAL_CACHE_LOCAL_TTL", "5"))
+    TOKEN_TTL = int(os.getenv("TOKEN_TTL", "86400"))
+    REVOCATION_SYNC_INTERVAL = float(os.getenv("REVOCATION_SYNC_INTERVAL", "2"))
+    REVOCATION_FULL_SYNC_INTERVAL = float(os.getenv("REVOCATION_FULL_SYNC_INTERVAL", "60"))
+    REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "10000"))
+    PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+    ROLE_REFRESH_INTERVAL = float(os.getenv("ROLE_REFRESH_INTERVAL", "60"))
+    # "auto" picks gevent when running under a gevent worker, else sync.
+    SERVER_MODE = os.getenv("SERVER_MODE", "auto")
+    # Worker processes serving the app; gunicorn.conf.py exports it.
+    WORKER_PROCESSES = int(os.getenv("WEB_CONCURRENCY", "1"))
+    # /apidocs: "lazy" reads the spec on first use, "eager" at startup, "off" disables it.
+    API_DOCS = os.getenv("API_DOCS", "lazy")
+    GEVENT_WORKER_CONNECTIONS = int(os.getenv("GEVENT_WORKER_CONNECTIONS", "1000"))
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "16"))
+    JSON_BACKEND = os.getenv("JSON_BACKEND", "auto")
+    REQUEST_INSTRUMENTATION = env_flag("REQUEST_INSTRUMENTATION", "True")
+    # "auto": redis with CACHE_REDIS_URL, else local for one worker, else none.
+    ARTICLE_CACHE_BACKEND = os.getenv("ARTICLE_CACHE_BACKEND", "auto")
+    ARTICLE_CACHE_TTL = int(os.getenv("ARTICLE_CACHE_TTL", "300"))
+    ARTICLE_CACHE_SIZE = int(os.getenv("ARTICLE_CACHE_SIZE", "5000"))
+    ARTICLE_PREVIEW_LENGTH = int(os.getenv("ARTICLE_PREVIEW_LENGTH", "200"))
+    COMPRESS_ENABLED = env_flag("COMPRESS_ENABLED", "True")
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))
+    COMPRESS_BR_QUALITY = int(os.getenv("COMPRESS_BR_QUALITY", "5"))
+    COMPRESS_CACHE_SIZE = int(os.getenv("COMPRESS_CACHE_SIZE", "1000"))
+    COMPRESS_CACHE_TTL = int(os.getenv("COMPRESS_CACHE_TTL", "300"))
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+    BULK_MAX_OPERATIONS = int(os.getenv("BULK_MAX_OPERATIONS", "1000"))
+    CHANGES_POLL_INTERVAL = float(os.getenv("CHANGES_POLL_INTERVAL", "1.0"))
+    CHANGES_MAX_WAIT = float(os.getenv("CHANGES_MAX_WAIT", "30"))
+    CHANGES_STREAM_TIMEOUT = float(os.getenv("CHANGES_STREAM_TIMEOUT", "300"))
+    # Long polls and streams a worker holds at once (each ties up a thread
+    # outside gevent); gunicorn.conf.py sizes it for the worker type.
+    CHANGES_MAX_WAITERS = int(os.getenv("CHANGES_MAX_WAITERS", "2"))
+    # Seconds of change log kept by scripts.prune_changes (default a week).
+    CHANGES_RETENTION = int(os.getenv("CHANGES_RETENTION", "604800"))
+    # Token buckets: per user (capacity, tokens refilled per second), and per
+    # client IP on /login and /signup. "auto" shares them through Redis when
+    # CACHE_REDIS_URL is set.
+    RATELIMIT_ENABLED = env_flag("RATELIMIT_ENABLED", "True")
+    RATELIMIT_BACKEND = os.getenv("RATELIMIT_BACKEND", "auto")
+    RATELIMIT_CAPACITY = int(os.getenv("RATELIMIT_CAPACITY", "300"))
+    RATELIMIT_RATE = float(os.getenv("RATELIMIT_RATE", "20"))
+    RATELIMIT_AUTH_CAPACITY = int(os.getenv("RATELIMIT_AUTH_CAPACITY", "30"))
+    RATELIMIT_AUTH_RATE = float(os.getenv("RATELIMIT_AUTH_RATE", "0.5"))
+    # Requests a worker runs at once before shedding with 503; defaults to
+    # the database pool's size plus overflow (none without a pool).
+    ADMISSION_MAX_CONCURRENT = (
+        int(os.environ["ADMISSION_MAX_CONCURRENT"])
+        if os.getenv("ADMISSION_MAX_CONCURRENT")
+        else None
+    )
+    ADMISSION_WAIT = float(os.getenv("ADMISSION_WAIT", "0.5"))
+    ADMISSION_EXEMPT = os.getenv(
+        "ADMISSION_EXEMPT", "articles.get_article_changes,metrics.get_metrics"
+    ).split(",")
+    # Reverse proxies in front of the app whose X-Forwarded-For is trusted
+    # for the client IP. 1 behind nginx, but only if clients cannot reach
+    # the app directly; otherwise they could forge the header.
+    PROXY_COUNT = int(os.getenv("PROXY_COUNT", "0"))
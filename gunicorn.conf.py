@@ -0,0 +1,92 @@
+"""Production gunicorn settings, read from the environment.
+
+gunicorn loads this file from the working directory, so ``gunicorn app:app``
+picks it up; ``GUNICORN_CMD_ARGS`` and command line flags still override it.
+
+- GUNICORN_WORKER_CLASS: ``gthread`` (default), ``gevent`` or ``sync``.
+- GUNICORN_WORKERS (or WEB_CONCURRENCY): processes. Defaults to
+  2 * CPUs + 1 for gthread and sync, and one per CPU for gevent, whose
+  workers each serve many requests at once.
+- GUNICORN_THREADS: threads per gthread worker (default 4).
+- GUNICORN_WORKER_CONNECTIONS: concurrent requests per gevent worker
+  (default 200).
+- GUNICORN_PRELOAD: import the app once in the master and fork it (default
+  on, except for gevent, whose workers monkey-patch only after the fork).
+- GUNICORN_MAX_REQUESTS / GUNICORN_MAX_REQUESTS_JITTER: recycle workers
+  after this many requests, staggered so they do not restart together.
+- GUNICORN_TIMEOUT / GUNICORN_GRACEFUL_TIMEOUT / GUNICORN_KEEPALIVE.
+
+Sync workers are silent while a request runs and are killed after
+``timeout``, which cuts long exports short; gthread and gevent workers keep
+reporting in, so prefer them. /articles/changes long polls and streams are
+capped per worker (CHANGES_MAX_WAITERS, set below) and refused under sync
+workers, which cannot spare their only thread.
+"""
+import multiprocessing
+import os
+
+
+def _env(name, default):
+    return os.getenv(f"GUNICORN_{name}", default)
+
+
+cpus = multiprocessing.cpu_count()
+
+bind = _env("BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+worker_class = _env("WORKER_CLASS", "gthread")
+if worker_class == "gevent":
+    default_workers = cpus
+else:
+    default_workers = 2 * cpus + 1
+workers = int(_env("WORKERS", os.getenv("WEB_CONCURRENCY", default_workers)))
+# Lets the app know it is not alone (see ARTICLE_CACHE_BACKEND=auto).
+os.environ["WEB_CONCURRENCY"] = str(workers)
+threads = int(_env("THREADS", "4")) if worker_class == "gthread" else 1
+worker_connections = int(_env("WORKER_CONNECTIONS", "200"))
+
+preload_app = _env("PRELOAD", str(worker_class != "gevent")).lower() in ("true", "1", "yes")
+
+max_requests = int(_env("MAX_REQUESTS", "1000"))
+max_requests_jitter = int(_env("MAX_REQUESTS_JITTER", "100"))
+timeout = int(_env("TIMEOUT", "30"))
+graceful_timeout = int(_env("GRACEFUL_TIMEOUT", "30"))
+keepalive = int(_env("KEEPALIVE", "5"))
+
+loglevel = _env("LOG_LEVEL", "info")
+accesslog = _env("ACCESS_LOG", None)
+errorlog = "-"
+
+# Worker heartbeats are file writes; keep them off a slow overlay filesystem.
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+# Size the app's database pool for what one worker can run at once, unless
+# it is set explicitly. This runs before the app (and config.py) is imported.
+if worker_class == "gthread":
+    os.environ.setdefault("DB_POOL_SIZE", str(threads))
+elif worker_class == "gevent":
+    os.environ.setdefault("GEVENT_WORKER_CONNECTIONS", str(worker_connections))
+# Long polls and streams of /articles/changes: half of a worker's threads,
+# none for sync workers, which have one; greenlets wait for free.
+if worker_class == "gevent":
+    os.environ.setdefault("CHANGES_MAX_WAITERS", str(worker_connections // 2))
+else:
+    os.environ.setdefault("CHANGES_MAX_WAITERS", str(threads // 2))
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master.
+
+    With ``preload_app`` the master created the app, and anything it opened
+    while doing so (the role registry loads at startup) would otherwise be
+    shared by every worker's pool. ``close=False`` leaves the sockets to the
+    master instead of closing them under it.
+    """
+    if not server.cfg.preload_app:
+        return
+    from models import db
+
+    app = server.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -1 +1,40 @@
 from .helpers import get_token, generate_token, decode_token, token_required
+from .revocation import revocations
+from .roles import roles
+from .pagination import (
+    InvalidPageRequest,
+    page_args,
+    paginate,
+    split_page,
+    add_page_links,
+)
+from .search import get_search_backend, register_search_backend
+from .principals import Principal, principals
+from .passwords import HashingPoolSaturated, passwords
+from .instrumentation import init_instrumentation, count_queries, assert_max_queries
+from .json_provider import JSONProvider, rows_response
+from .metrics import metrics
+from .pool import init_pool, init_engine_events
+from .serving import init_serving
+from .replicas import replicas, read_replica
+from .ratelimit import (
+    rate_limiter,
+    rate_limit,
+    list_cost,
+    bulk_cost,
+    COST_GET,
+    COST_WRITE,
+    COST_LIST,
+    COST_SEARCH,
+    COST_EXPORT,
+)
+from .admission import admission, busy_response
+from .conditional import (
+    is_not_modified,
+    precondition_failed,
+    add_validators,
+    not_modified_response,
+)
+from .response_cache import article_cache
+from .compression import compression, negotiate_encoding
+from .export import stream_rows, FORMATS as EXPORT_FORMATS
@@ -0,0 +1,102 @@
+import threading
+
+from flask import g, jsonify, request
+
+from .metrics import metrics
+
+
+def busy_response():
+    """503 telling the client to come back shortly."""
+    response = jsonify({"error": "Server is busy, try again later"})
+    response.status_code = 503
+    response.headers["Retry-After"] = "1"
+    return response
+
+
+class AdmissionControl:
+    """Caps the requests a worker runs at once, shedding the excess with 503.
+
+    Past the database pool's capacity, extra requests would only queue for
+    a connection until ``pool_timeout`` and fail anyway, while holding
+    memory and client sockets. Instead a request waits at most
+    ``ADMISSION_WAIT`` seconds for a slot and then gets 503 with
+    ``Retry-After``. ``ADMISSION_MAX_CONCURRENT`` defaults to the pool size
+    plus overflow; 0 turns the limit off. Endpoints in
+    ``ADMISSION_EXEMPT`` (long-polls, metrics) are not counted.
+
+    Requests that hold their thread while waiting for something to happen
+    (the changes long poll and stream) take one of ``CHANGES_MAX_WAITERS``
+    wait slots instead, without queuing: a worker with threads to spare
+    for only a few of them turns the rest away rather than stalling.
+    """
+
+    def __init__(self):
+        self.limit = 0
+        self.in_flight = 0
+        self._slots = None
+        self.waiters = 0
+        self.waiting = 0
+        self._wait_slots = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.limit = app.config["ADMISSION_MAX_CONCURRENT"]
+        if self.limit is None:
+            options = app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+            self.limit = 0
+            if "pool_size" in options:
+                self.limit = options["pool_size"] + options["max_overflow"]
+        self.wait = app.config["ADMISSION_WAIT"]
+        self.exempt = set(app.config["ADMISSION_EXEMPT"])
+        self.in_flight = 0
+        self._slots = None
+        self.waiters = app.config["CHANGES_MAX_WAITERS"]
+        self.waiting = 0
+        self._wait_slots = threading.BoundedSemaphore(self.waiters) if self.waiters else None
+        metrics.register_collector(self.stats)
+        if not self.limit:
+            return
+        self._slots = threading.BoundedSemaphore(self.limit)
+        app.before_request(self._admit)
+        app.teardown_request(self._release)
+
+    def _admit(self):
+        if request.endpoint in self.exempt:
+            return None
+        if not self._slots.acquire(timeout=self.wait):
+            metrics.inc("admission.rejected")
+            return busy_response()
+        g.admitted = True
+        with self._lock:
+            self.in_flight += 1
+        return None
+
+    def _release(self, exc=None):
+        if g.pop("admitted", False):
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+
+    def begin_wait(self):
+        """Take a wait slot if one is free; the caller must ``end_wait`` if this returns True."""
+        if self._wait_slots is None or not self._wait_slots.acquire(blocking=False):
+            metrics.inc("admission.waits_rejected")
+            return False
+        with self._lock:
+            self.waiting += 1
+        return True
+
+    def end_wait(self):
+        with self._lock:
+            self.waiting -= 1
+        self._wait_slots.release()
+
+    def stats(self):
+        return {
+            "admission.in_flight": self.in_flight,
+            "admission.limit": self.limit,
+            "admission.waiting": self.waiting,
+        }
+
+
+admission = AdmissionControl()
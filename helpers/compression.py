@@ -0,0 +1,156 @@
+import zlib
+
+from flask import request
+
+from .cache import LocalCache
+from .metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/csv", "text/plain")
+ENCODINGS = ("br", "gzip")
+
+
+def encoded_etag(tag, encoding):
+    """The ETag of ``tag``'s representation in ``encoding``.
+
+    Each encoding is a different representation, so caches must not treat
+    their bytes as interchangeable; the suffix keeps the ETag strong.
+    """
+    return f"{tag}-{encoding}" if encoding else tag
+
+
+def etag_variants(tag):
+    """``tag`` as it may come back from a client, under any encoding."""
+    return [tag] + [encoded_etag(tag, encoding) for encoding in ENCODINGS]
+
+
+def mark_negotiated(response):
+    """Tell Compression that the view chose the encoding itself."""
+    response.encoding_negotiated = True
+    return response
+
+
+def available_encodings():
+    """Encodings we can produce, in order of preference."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding():
+    """Pick the best encoding the client accepts, or None for identity."""
+    return request.accept_encodings.best_match(available_encodings())
+
+
+def _compressor(encoding, config):
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=config["COMPRESS_BR_QUALITY"])
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(config["COMPRESS_LEVEL"], zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+
+def compress(data, encoding, config):
+    process, finish = _compressor(encoding, config)
+    return process(data) + finish()
+
+
+def compress_chunks(chunks, encoding, config):
+    """Compress an iterable of str or bytes chunks without buffering it."""
+    process, finish = _compressor(encoding, config)
+    for chunk in chunks:
+        data = process(chunk.encode() if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+class Compression:
+    """Compress responses negotiated through Accept-Encoding.
+
+    Buffered responses are compressed once they reach ``COMPRESS_MIN_SIZE``
+    bytes; streamed ones are wrapped in a streaming compressor. Responses
+    marked with ``mark_negotiated`` are left alone. A compressed response's
+    strong ETag gets the encoding as a suffix (``encoded_etag``), and
+    ``helpers.conditional`` accepts every variant. Bodies with a strong ETag
+    always encode to the same bytes, so their compressed form is kept in a
+    small LRU and cache hits are not recompressed.
+    """
+
+    def __init__(self):
+        self.config = None
+        self.cache = None
+
+    def init_app(self, app):
+        if not app.config["COMPRESS_ENABLED"]:
+            return
+        self.config = app.config
+        self.cache = LocalCache(app.config["COMPRESS_CACHE_SIZE"], app.config["COMPRESS_CACHE_TTL"])
+        app.after_request(self.compress_response)
+
+    def _skip(self, response):
+        return (
+            response.status_code != 200
+            or request.method == "HEAD"
+            or getattr(response, "encoding_negotiated", False)
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES
+        )
+
+    def compress_response(self, response):
+        if response.status_code == 304:
+            return self._echo_etag(response)
+        if self._skip(response):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = negotiate_encoding()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = compress_chunks(response.response, encoding, self.config)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < self.config["COMPRESS_MIN_SIZE"]:
+                return response
+            response.set_data(self._compressed(data, encoding, response.get_etag()))
+            metrics.inc("compression.bytes_in", len(data))
+            metrics.inc("compression.bytes_out", response.content_length)
+        response.headers["Content-Encoding"] = encoding
+        tag, weak = response.get_etag()
+        if tag is not None and not weak:
+            response.set_etag(encoded_etag(tag, encoding))
+        return response
+
+    def _echo_etag(self, response):
+        # A 304 carries the ETag of the representation the client has,
+        # which is the encoded variant it sent in If-None-Match.
+        tag, weak = response.get_etag()
+        if tag is None or weak:
+            return response
+        for variant in etag_variants(tag)[1:]:
+            if request.if_none_match.contains_weak(variant):
+                response.set_etag(variant)
+                break
+        return response
+
+    def _compressed(self, data, encoding, etag):
+        tag, weak = etag
+        if tag is None or weak:
+            return compress(data, encoding, self.config)
+        key = f"{encoding}:{tag}"
+        compressed = self.cache.get(key)
+        if compressed is None:
+            compressed = compress(data, encoding, self.config)
+            self.cache.set(key, compressed)
+            metrics.inc("compression.cache_misses")
+        else:
+            metrics.inc("compression.cache_hits")
+        return compressed
+
+
+compression = Compression()
@@ -0,0 +1,39 @@
+from flask import request, make_response
+
+from .compression import etag_variants
+
+
+def is_not_modified(etag, last_modified=None):
+    """Evaluate If-None-Match / If-Modified-Since for a GET request.
+
+    If-None-Match wins when present (RFC 9110 13.2.2); If-Modified-Since is
+    only consulted when a ``last_modified`` is given. The ETag of any
+    content encoding of the same body matches.
+    """
+    if request.if_none_match:
+        return any(request.if_none_match.contains_weak(t) for t in etag_variants(etag))
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def precondition_failed(get_etag):
+    """True when the request carries an If-Match the current ETag does not satisfy.
+
+    ``get_etag`` is only called when If-Match is present, so computing the
+    ETag costs nothing for clients that do not use it.
+    """
+    if not request.if_match:
+        return False
+    return not any(request.if_match.contains(t) for t in etag_variants(get_etag()))
+
+
+def add_validators(response, etag, last_modified=None):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
+
+
+def not_modified_response(etag, last_modified=None):
+    return add_validators(make_response("", 304), etag, last_modified)
@@ -0,0 +1,48 @@
+import os
+
+from flasgger import Swagger
+
+SPEC_SOURCE = "docs/swagger.yml"
+SPEC_COMPILED = "docs/swagger.json"
+API_DOCS_MODES = ("lazy", "eager")
+
+
+def spec_file(app):
+    """The compiled JSON spec if it is up to date, else the YAML source.
+
+    Parsing the YAML takes about as long as the rest of create_app;
+    ``python -m scripts.build_spec`` writes the JSON once at build time.
+    """
+    source = os.path.join(app.root_path, SPEC_SOURCE)
+    compiled = os.path.join(app.root_path, SPEC_COMPILED)
+    if os.path.exists(compiled) and os.path.getmtime(compiled) >= os.path.getmtime(source):
+        return SPEC_COMPILED
+    return SPEC_SOURCE
+
+
+class LazySwagger(Swagger):
+    """Swagger that reads its template file on the first docs request."""
+
+    def init_app(self, app, decorators=None):
+        template_file, self.template_file = self.template_file, None
+        super().init_app(app, decorators)
+        self.template_file = template_file
+
+    @property
+    def template(self):
+        if self._template is None and self.template_file is not None:
+            self._template = self.load_swagger_file(self.template_file)
+        return self._template
+
+    @template.setter
+    def template(self, value):
+        self._template = value
+
+
+def init_docs(app):
+    """Serve /apidocs, reading the spec at startup or on first use (``API_DOCS``)."""
+    mode = app.config["API_DOCS"]
+    if mode not in API_DOCS_MODES:
+        raise RuntimeError(f"Unknown API_DOCS: {mode}")
+    swagger_class = LazySwagger if mode == "lazy" else Swagger
+    swagger_class(app, template_file=spec_file(app))
@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+
+from flask import Response, current_app, request, stream_with_context
+
+from .compression import compress_chunks, mark_negotiated, negotiate_encoding
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+CHUNK_ROWS = 200
+
+
+def ndjson_chunks(rows, serialize):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(serialize(row), ensure_ascii=False))
+        if len(lines) >= CHUNK_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def csv_chunks(rows, serialize, columns):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    for i, row in enumerate(rows, 1):
+        writer.writerow(serialize(row))
+        if i % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_encoding():
+    """``gzip=1`` forces gzip and ``gzip=0`` turns it off; else negotiate."""
+    value = request.args.get("gzip")
+    if value is None:
+        return negotiate_encoding()
+    return "gzip" if value.lower() in ("1", "true", "yes") else None
+
+
+def stream_rows(rows, fmt, serialize, columns, filename):
+    """Stream ``rows`` as NDJSON or CSV without building the body in memory.
+
+    ``rows`` should be a lazily evaluated query (``yield_per``) so that only
+    one batch of rows is held at a time.
+    """
+    if fmt == "csv":
+        chunks = csv_chunks(rows, serialize, columns)
+    else:
+        chunks = ndjson_chunks(rows, serialize)
+
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    encoding = export_encoding()
+    if encoding is not None:
+        chunks = compress_chunks(chunks, encoding, current_app.config)
+        headers["Content-Encoding"] = encoding
+    headers["Vary"] = "Accept-Encoding"
+    # gzip=0 means identity even when Accept-Encoding allows more.
+    return mark_negotiated(
+        Response(stream_with_context(chunks), mimetype=FORMATS[fmt], headers=headers)
+    )
@@ -1,17 +1,15 @@
-import os
 import datetime
+import uuid
 from datetime import timezone
 from functools import wraps
 
-from flask import request, jsonify, g
+from flask import current_app, request, jsonify, g
 import jwt
-from dotenv import load_dotenv
 
-from models import db, User
+from .principals import Principal, principals
+from .revocation import revocations
+from .roles import roles
 
-load_dotenv()
-
-SECRET_KEY = os.getenv("SECRET_KEY")
 
 def get_token(test_client, user):
     response = test_client.post(
@@ -20,20 +18,33 @@ def get_token(test_client, user):
     )
     return response.json["token"]
 
-def generate_token(user_id, role):
+
+def generate_token(user_id, role_id, username=None):
+    """Sign a token for the user.
+
+    The claims carry everything token_required needs, so it does not have to
+    load the user; ``jti`` lets a single token be revoked. Authorization
+    uses ``role_id``; the ``role`` name is informational.
+    """
+    now = datetime.datetime.now(timezone.utc)
     payload = {
         "user_id": user_id,
-        "role": role,
-        "exp": datetime.datetime.now(timezone.utc) + datetime.timedelta(hours=24),
+        "role_id": role_id,
+        "role": roles.name(role_id),
+        "jti": uuid.uuid4().hex,
+        "iat": now.timestamp(),
+        "exp": now + datetime.timedelta(seconds=current_app.config["TOKEN_TTL"]),
     }
-    return jwt.encode(payload, SECRET_KEY, algorithm="HS256")
+    if username is not None:
+        payload["username"] = username
+    return jwt.encode(payload, current_app.config["SECRET_KEY"], algorithm="HS256")
 
 
 def decode_token(token):
     try:
         if token.startswith("Bearer "):
             token = token[7:]
-        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+        payload = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"])
         return payload
     except jwt.ExpiredSignatureError:
         return None
@@ -50,11 +61,24 @@ def token_required(f):
         payload = decode_token(token)
         if not payload:
             return jsonify({"error": "Invalid or expired token"}), 403
-        user = db.session.get(User, payload["user_id"])
-        if not user:
-            return jsonify({"error": "User not found"}), 404
-        g.current_user = user
-        g.current_role = payload["role"]
+        if revocations.is_revoked(payload):
+            return jsonify({"error": "Token has been revoked"}), 403
+        if "role_id" in payload:
+            role = roles.name(payload["role_id"])
+            if role is None:
+                return jsonify({"error": "Invalid or expired token"}), 403
+        else:
+            role = payload["role"]
+        if "username" in payload:
+            principal = Principal(payload["user_id"], payload["username"], role)
+        else:
+            # Tokens issued before the username claim existed.
+            principal = principals.get(payload["user_id"])
+            if not principal:
+                return jsonify({"error": "User not found"}), 404
+        g.current_user = principal
+        g.current_role = role
+        g.token = payload
         return f(*args, **kwargs)
 
     return decorator
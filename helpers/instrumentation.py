@@ -0,0 +1,120 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+logger = logging.getLogger("app.requests")
+
+_counters = []
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+        self.statements = []
+
+    def record_query(self, statement, elapsed):
+        self.count += 1
+        self.db_time += elapsed
+        self.statements.append(statement)
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = statement
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # One statement runs at a time per connection. A statement that fails
+    # never reaches _after_cursor_execute; the next one overwrites its start.
+    conn.info["query_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop("query_start")
+    for counter in _counters:
+        counter.record_query(statement, elapsed)
+    if has_request_context() and "query_stats" in g:
+        g.query_stats.record_query(statement, elapsed)
+
+
+def record_serialization(elapsed):
+    if has_request_context() and "query_stats" in g:
+        g.query_stats.serialize_time += elapsed
+
+
+@contextmanager
+def count_queries():
+    """Collect every SQL statement executed inside the block."""
+    stats = QueryStats()
+    _counters.append(stats)
+    try:
+        yield stats
+    finally:
+        _counters.remove(stats)
+
+
+@contextmanager
+def assert_max_queries(limit):
+    with count_queries() as stats:
+        yield stats
+    assert stats.count <= limit, (
+        f"{stats.count} queries executed, expected at most {limit}:\n"
+        + "\n".join(stats.statements)
+    )
+
+
+def _start_request():
+    g.query_stats = QueryStats()
+    g.request_start = time.perf_counter()
+
+
+def _finish_request(response):
+    stats = g.get("query_stats")
+    if stats is None:
+        return response
+    total = time.perf_counter() - g.request_start
+
+    response.headers["Server-Timing"] = ", ".join(
+        [
+            f'db;dur={stats.db_time * 1000:.2f};desc="{stats.count} queries"',
+            f"serialize;dur={stats.serialize_time * 1000:.2f}",
+            f"total;dur={total * 1000:.2f}",
+        ]
+    )
+    logger.info(
+        json.dumps(
+            {
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "duration_ms": round(total * 1000, 2),
+                "queries": stats.count,
+                "db_ms": round(stats.db_time * 1000, 2),
+                "slowest_query_ms": round(stats.slowest_time * 1000, 2),
+                "slowest_query": (stats.slowest_statement or "")[:200],
+                "serialize_ms": round(stats.serialize_time * 1000, 2),
+            }
+        )
+    )
+    return response
+
+
+def init_instrumentation(app):
+    # count_queries and the query budgets depend on these, so they are
+    # installed whether or not requests are instrumented.
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    if not app.config["REQUEST_INSTRUMENTATION"]:
+        return
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
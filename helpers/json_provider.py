@@ -0,0 +1,85 @@
+import time
+
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+
+from .instrumentation import record_serialization
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class JSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, backed by orjson when it is installed.
+
+    ``JSON_BACKEND`` selects the encoder: "auto" uses orjson if available,
+    "orjson" requires it and "stdlib" forces the standard library. Output
+    matches the stdlib provider (sorted keys, HTTP dates), and serialization
+    is timed for Server-Timing either way.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        backend = app.config.get("JSON_BACKEND", "auto")
+        if backend == "orjson" and orjson is None:
+            raise RuntimeError("JSON_BACKEND=orjson requires the orjson package")
+        self.fast = orjson is not None and backend in ("auto", "orjson")
+
+    def _orjson_options(self):
+        # Let datetimes reach ``default`` so they keep Flask's HTTP date format.
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps_bytes(self, obj):
+        """Serialize ``obj`` to UTF-8 JSON bytes, ready to be a response body."""
+        start = time.perf_counter()
+        try:
+            if self.fast:
+                return orjson.dumps(obj, default=self.default, option=self._orjson_options())
+            return super().dumps(obj).encode()
+        finally:
+            record_serialization(time.perf_counter() - start)
+
+    def dumps(self, obj, **kwargs):
+        if self.fast and not kwargs:
+            return self.dumps_bytes(obj).decode()
+        start = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            record_serialization(time.perf_counter() - start)
+
+    def loads(self, s, **kwargs):
+        if self.fast and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def _pretty(self):
+        return self.compact is False or (self.compact is None and self._app.debug)
+
+    def response(self, *args, **kwargs):
+        if self._pretty():
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
+
+    def dump_rows(self, rows, fields):
+        """Encode query rows as a JSON array of ``fields`` objects.
+
+        Attributes go from each row straight into the encoder, skipping the
+        per-model ``serialize`` call and the str round trip of ``dumps``.
+        A short-lived dict per row is still the fastest input for both
+        encoders; splicing pre-encoded values together measured slower.
+        """
+        return self.dumps_bytes([{f: getattr(row, f) for f in fields} for row in rows])
+
+
+def rows_response(rows, fields):
+    """JSON response listing ``fields`` of each row; see ``JSONProvider.dump_rows``."""
+    return current_app.response_class(
+        current_app.json.dump_rows(rows, fields), mimetype="application/json"
+    )
@@ -0,0 +1,52 @@
+import threading
+from collections import defaultdict
+
+
+class Metrics:
+    """Per-process counters, timing summaries and on-demand gauges."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._timings = {}
+        self._collectors = []
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self._counters[name] += value
+
+    def counter(self, name):
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            timing = self._timings.setdefault(name, {"count": 0, "sum": 0.0, "max": 0.0})
+            timing["count"] += 1
+            timing["sum"] += seconds
+            timing["max"] = max(timing["max"], seconds)
+
+    def register_collector(self, collector):
+        """Register a callable returning a dict of gauges, read at snapshot time."""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def snapshot(self):
+        with self._lock:
+            data = {
+                "counters": dict(self._counters),
+                "timings": {name: dict(t) for name, t in self._timings.items()},
+            }
+        gauges = {}
+        for collector in self._collectors:
+            gauges.update(collector())
+        data["gauges"] = gauges
+        return data
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._timings.clear()
+
+
+metrics = Metrics()
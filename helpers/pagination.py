@@ -0,0 +1,110 @@
+import base64
+import binascii
+import json
+
+from flask import current_app, request, url_for
+from sqlalchemy import and_, or_
+
+
+class InvalidPageRequest(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, keys):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, binascii.Error):
+        raise InvalidPageRequest("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise InvalidPageRequest("Invalid cursor")
+
+    decoded = []
+    for value, (_, column, _) in zip(values, keys):
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise InvalidPageRequest("Invalid cursor")
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            python_type = None
+        if python_type is not None:
+            try:
+                value = python_type(value)
+            except (TypeError, ValueError):
+                raise InvalidPageRequest("Invalid cursor")
+        decoded.append(value)
+    return decoded
+
+
+def page_args(keys):
+    """Read ``limit`` and ``after`` from the query string.
+
+    ``limit`` falls back to PAGE_SIZE_DEFAULT and is capped at PAGE_SIZE_MAX,
+    so a client can never ask for an unbounded page.
+    """
+    limit = request.args.get("limit")
+    if limit is None:
+        limit = current_app.config["PAGE_SIZE_DEFAULT"]
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise InvalidPageRequest("Invalid limit")
+        if limit < 1:
+            raise InvalidPageRequest("Invalid limit")
+    limit = min(limit, current_app.config["PAGE_SIZE_MAX"])
+
+    after = request.args.get("after")
+    if after:
+        after = decode_cursor(after, keys)
+    else:
+        after = None
+    return limit, after
+
+
+def keyset_filter(keys, values):
+    clause = None
+    for (_, column, descending), value in reversed(list(zip(keys, values))):
+        past = column < value if descending else column > value
+        if clause is None:
+            clause = past
+        else:
+            clause = or_(past, and_(column == value, clause))
+    return clause
+
+
+def paginate(query, keys, limit, after=None):
+    """Apply keyset pagination to a Query or Select.
+
+    ``keys`` is a list of ``(name, column, descending)`` tuples giving the sort
+    order; ``name`` is the attribute the key is read back from on result rows.
+    One extra row is fetched so that ``split_page`` can tell if there is a
+    next page without a COUNT.
+    """
+    if after is not None:
+        query = query.filter(keyset_filter(keys, after))
+    order = [column.desc() if descending else column.asc() for _, column, descending in keys]
+    return query.order_by(*order).limit(limit + 1)
+
+
+def split_page(rows, keys, limit):
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, name) for name, _, _ in keys])
+
+
+def add_page_links(response, next_cursor):
+    if next_cursor:
+        args = request.args.to_dict()
+        args["after"] = next_cursor
+        next_url = url_for(request.endpoint, **(request.view_args or {}), **args)
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return response
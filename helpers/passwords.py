@@ -0,0 +1,75 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import jsonify
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingPoolSaturated(Exception):
+    pass
+
+
+class PasswordHasher:
+    """Runs password hashing on a bounded pool of worker threads.
+
+    At most ``workers`` hashes run at once and ``queue`` more may wait; any
+    further call fails immediately with HashingPoolSaturated (a 503) instead
+    of piling up behind a login burst.
+    """
+
+    def __init__(self, workers=2, queue=16, method="scrypt"):
+        self._executor = None
+        self.configure(workers, queue, method)
+
+    def init_app(self, app):
+        executor_class = ThreadPoolExecutor
+        if app.config["SERVER_MODE"] == "gevent":
+            # Monkey-patched threads are greenlets, and a hash would stall
+            # every request in the worker; gevent's executor uses real threads.
+            from gevent.threadpool import ThreadPoolExecutor as executor_class
+        self.configure(
+            app.config["PASSWORD_HASH_WORKERS"],
+            app.config["PASSWORD_HASH_QUEUE"],
+            app.config["PASSWORD_HASH_METHOD"],
+            executor_class,
+        )
+        app.register_error_handler(HashingPoolSaturated, saturated_response)
+
+    def configure(self, workers, queue, method, executor_class=ThreadPoolExecutor):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self.method = method
+        self._executor = executor_class(workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + queue)
+        self._prefix = None
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingPoolSaturated()
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        return self._run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        # Werkzeug expands e.g. "scrypt" to "scrypt:32768:8:1" in the stored
+        # hash, so compare against the prefix it actually produces.
+        if self._prefix is None:
+            self._prefix = generate_password_hash("", self.method).split("$", 1)[0]
+        return stored_hash.split("$", 1)[0] != self._prefix
+
+
+def saturated_response(e):
+    response = jsonify({"error": "Server is busy, try again later"})
+    response.status_code = 503
+    response.headers["Retry-After"] = "1"
+    return response
+
+
+passwords = PasswordHasher()
@@ -0,0 +1,75 @@
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+from models import db
+from .metrics import metrics
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            metrics.inc("db.pool.timeouts")
+            raise
+        finally:
+            metrics.observe("db.pool.wait", time.perf_counter() - start)
+
+
+def pool_stats():
+    stats = {}
+    for bind, engine in db.engines.items():
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            continue
+        prefix = "db.pool" if bind is None else f"db.pool.{bind}"
+        stats[f"{prefix}.size"] = pool.size()
+        stats[f"{prefix}.checked_out"] = pool.checkedout()
+        stats[f"{prefix}.checked_in"] = pool.checkedin()
+        stats[f"{prefix}.overflow"] = max(pool.overflow(), 0)
+    return stats
+
+
+def _set_local_statement_timeout(timeout_ms):
+    def on_begin(connection):
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout_ms}")
+
+    return on_begin
+
+
+def init_pool(app):
+    """Set up pooling before ``db.init_app`` creates the engines."""
+    options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    if "pool_size" in options:
+        options.setdefault("poolclass", InstrumentedQueuePool)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+    for key, bind in (app.config.get("SQLALCHEMY_BINDS") or {}).items():
+        if isinstance(bind, dict) and "pool_size" in bind:
+            app.config["SQLALCHEMY_BINDS"][key] = {"poolclass": InstrumentedQueuePool, **bind}
+    metrics.register_collector(pool_stats)
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys, and so ON DELETE CASCADE, unless asked.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys = ON")
+    cursor.close()
+
+
+def init_engine_events(app):
+    """Apply per-connection and per-transaction settings once the engines exist."""
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        if engine.dialect.name == "sqlite":
+            event.listen(engine, "connect", _enable_sqlite_foreign_keys)
+    timeout = app.config.get("DB_STATEMENT_TIMEOUT_MS")
+    if not (app.config.get("DB_PGBOUNCER") and timeout):
+        return
+    for engine in engines:
+        event.listen(engine, "begin", _set_local_statement_timeout(int(timeout)))
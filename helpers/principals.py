@@ -0,0 +1,54 @@
+from collections import namedtuple
+
+from models import db, User
+from .cache import LocalCache, RedisCache, TieredCache, redis_client
+from .roles import roles
+
+
+Principal = namedtuple("Principal", ["id", "username", "role"])
+
+
+class PrincipalCache:
+    """Caches the authenticated user by id so token_required can skip the DB.
+
+    Entries live in a per-process LRU, optionally backed by Redis. An
+    invalidation clears Redis and this worker's LRU only: other workers keep
+    serving their copy until it expires, so the LRU keeps entries for just
+    ``PRINCIPAL_CACHE_LOCAL_TTL`` seconds, while Redis keeps them for
+    ``PRINCIPAL_CACHE_TTL``. Users who are changed or deleted also have
+    their tokens revoked, which every worker picks up within
+    ``REVOCATION_SYNC_INTERVAL``.
+    """
+
+    def __init__(self):
+        self.cache = TieredCache(LocalCache())
+
+    def init_app(self, app):
+        ttl = app.config["PRINCIPAL_CACHE_TTL"]
+        local = LocalCache(
+            app.config["PRINCIPAL_CACHE_SIZE"], app.config["PRINCIPAL_CACHE_LOCAL_TTL"]
+        )
+        shared = None
+        if app.config.get("CACHE_REDIS_URL"):
+            shared = RedisCache(
+                redis_client(app.config["CACHE_REDIS_URL"]), ttl, prefix="principal:"
+            )
+        self.cache = TieredCache(local, shared)
+
+    def get(self, user_id):
+        cached = self.cache.get(str(user_id))
+        if cached is not None:
+            return Principal(*cached)
+
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        principal = Principal(user.id, user.username, roles.name(user.role_id))
+        self.cache.set(str(user_id), tuple(principal))
+        return principal
+
+    def invalidate(self, user_id):
+        self.cache.delete(str(user_id))
+
+
+principals = PrincipalCache()
@@ -0,0 +1,183 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import g, jsonify, request
+
+from .cache import redis_client
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Request costs in tokens; a user's bucket refills RATELIMIT_RATE per second.
+COST_GET = 1
+COST_WRITE = 2
+COST_LIST = 5
+COST_SEARCH = 10
+COST_EXPORT = 20
+
+
+def list_cost():
+    """Cost of a list route, which searches when ``q`` is given."""
+    return COST_SEARCH if request.args.get("q") else COST_LIST
+
+
+def bulk_cost():
+    """Cost of /articles/bulk: a write per operation in the body."""
+    operations = request.get_json(silent=True)
+    if not isinstance(operations, list):
+        return COST_WRITE
+    return COST_WRITE * max(len(operations), 1)
+
+
+class MemoryBuckets:
+    """Token buckets in this process, LRU-capped at ``maxsize`` keys."""
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, cost):
+        """Refill, then take ``cost`` tokens if there are enough. Returns (allowed, tokens)."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._data.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._data[key] = (tokens, now)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return allowed, tokens
+
+
+# Refill and take in one round trip, atomically for every worker. A bucket
+# expires once it would be full again, so idle keys cost nothing.
+TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", tostring(now))
+redis.call("EXPIRE", KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisBuckets:
+    """Token buckets shared by every worker, kept in Redis."""
+
+    def __init__(self, client, prefix="ratelimit:"):
+        self.prefix = prefix
+        self.script = client.register_script(TAKE_SCRIPT)
+
+    def take(self, key, capacity, rate, cost):
+        allowed, tokens = self.script(
+            keys=[self.prefix + key], args=[capacity, rate, time.time(), cost]
+        )
+        return bool(allowed), float(tokens)
+
+
+class RateLimiter:
+    """Token-bucket rate limits per user, or per client IP before login.
+
+    Each bucket holds up to ``capacity`` tokens and refills ``rate`` tokens
+    per second; a request takes its route's cost. The outcome goes out in
+    ``RateLimit-Limit``/``-Remaining``/``-Reset`` headers, and a request
+    without enough tokens gets 429 with ``Retry-After``. Buckets live in
+    this process, or in Redis (``RATELIMIT_BACKEND``) so that every worker
+    draws from the same ones. If Redis fails, requests are let through.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.buckets = MemoryBuckets()
+        self.policies = {}
+
+    def init_app(self, app):
+        self.enabled = app.config["RATELIMIT_ENABLED"]
+        self.policies = {
+            "user": (app.config["RATELIMIT_CAPACITY"], app.config["RATELIMIT_RATE"]),
+            "ip": (app.config["RATELIMIT_AUTH_CAPACITY"], app.config["RATELIMIT_AUTH_RATE"]),
+        }
+        backend = app.config["RATELIMIT_BACKEND"]
+        if backend == "auto":
+            backend = "redis" if app.config.get("CACHE_REDIS_URL") else "memory"
+        if backend == "redis":
+            self.buckets = RedisBuckets(redis_client(app.config["CACHE_REDIS_URL"]))
+        elif backend == "memory":
+            self.buckets = MemoryBuckets()
+        else:
+            raise RuntimeError(f"Unknown RATELIMIT_BACKEND: {backend}")
+        app.after_request(self._add_headers)
+
+    def check(self, scope, cost):
+        """Take ``cost`` tokens from the caller's bucket; a 429 response if there are too few."""
+        capacity, rate = self.policies[scope]
+        # A request costing more than a full bucket could never go through.
+        cost = min(cost, capacity)
+        if scope == "user":
+            key = f"user:{g.current_user.id}"
+        else:
+            key = f"ip:{request.remote_addr}"
+        try:
+            allowed, tokens = self.buckets.take(key, capacity, rate, cost)
+        except Exception:
+            logger.warning("Rate limit backend failed, allowing the request", exc_info=True)
+            metrics.inc("ratelimit.errors")
+            return None
+        g.rate_limit = (capacity, math.floor(tokens), math.ceil((capacity - tokens) / rate))
+        if allowed:
+            return None
+        metrics.inc("ratelimit.limited")
+        response = jsonify({"error": "Too many requests"})
+        response.status_code = 429
+        response.headers["Retry-After"] = str(math.ceil((cost - tokens) / rate))
+        return response
+
+    def _add_headers(self, response):
+        limit = g.get("rate_limit")
+        if limit is not None:
+            response.headers["RateLimit-Limit"] = str(limit[0])
+            response.headers["RateLimit-Remaining"] = str(limit[1])
+            response.headers["RateLimit-Reset"] = str(limit[2])
+        return response
+
+
+rate_limiter = RateLimiter()
+
+
+def rate_limit(cost=COST_GET, scope="user"):
+    """Charge ``cost`` tokens (a number, or a callable returning one) per request.
+
+    With ``scope="user"`` apply it below ``token_required``; ``scope="ip"``
+    is for routes that run before the caller is known, such as /login.
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if rate_limiter.enabled:
+                limited = rate_limiter.check(scope, cost() if callable(cost) else cost)
+                if limited is not None:
+                    return limited
+            return f(*args, **kwargs)
+
+        return decorated
+
+    return decorator
@@ -0,0 +1,161 @@
+import logging
+import random
+import threading
+import time
+from functools import wraps
+
+from flask import g, request
+from sqlalchemy import event
+
+from models import db
+from .cache import LocalCache, RedisCache, redis_client
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+REPLICA_PREFIX = "replica_"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Streaming replicas report lag as the age of the last replayed transaction,
+# which also grows on an idle primary; only count it while WAL is pending.
+PG_LAG_QUERY = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+class ReplicaRouter:
+    """Chooses a healthy read replica for safe requests.
+
+    Replicas are the ``replica_*`` entries of ``SQLALCHEMY_BINDS``. Each one
+    is probed at most every ``REPLICA_HEALTH_INTERVAL`` seconds, and marked
+    down when it is unreachable, lags by more than ``REPLICA_MAX_LAG`` or
+    drops a connection; reads fall back to the primary while none is up.
+    For ``REPLICA_STICKY_SECONDS`` after a user's write, that user's reads
+    stay on the primary so they see their own changes. Endpoints in
+    ``REPLICA_WRITE_EXEMPT`` (login and the other token routes) do not count
+    as writes.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.engines = {}
+        self.recent_writes = None
+        self._health = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.keys = sorted(k for k in app.config["SQLALCHEMY_BINDS"] if k.startswith(REPLICA_PREFIX))
+        self.window = app.config["REPLICA_STICKY_SECONDS"]
+        self.interval = app.config["REPLICA_HEALTH_INTERVAL"]
+        self.max_lag = app.config["REPLICA_MAX_LAG"]
+        self.write_exempt = set(app.config["REPLICA_WRITE_EXEMPT"])
+        self._health = {}
+        if app.config.get("CACHE_REDIS_URL"):
+            client = redis_client(app.config["CACHE_REDIS_URL"])
+            self.recent_writes = RedisCache(client, self.window, prefix="replica:")
+        else:
+            self.recent_writes = LocalCache(10000, self.window)
+        if not self.keys:
+            return
+        with app.app_context():
+            self.engines = {key: db.engines[key] for key in self.keys}
+        for key, engine in self.engines.items():
+            event.listen(engine, "handle_error", self._on_error(key))
+        app.after_request(self._record_write)
+        metrics.register_collector(self.stats)
+
+    def _on_error(self, key):
+        def handle_error(context):
+            if context.is_disconnect:
+                self._set_health(key, False)
+        return handle_error
+
+    def _set_health(self, key, healthy):
+        self._health[key] = (healthy, time.monotonic())
+
+    def _probe(self, key):
+        engine = self.engines[key]
+        try:
+            with engine.connect() as conn:
+                if engine.dialect.name == "postgresql":
+                    lag = float(conn.exec_driver_sql(PG_LAG_QUERY).scalar())
+                    if lag > self.max_lag:
+                        logger.warning("Replica %s is %.1fs behind, skipping it", key, lag)
+                        return False
+                else:
+                    conn.exec_driver_sql("SELECT 1")
+            return True
+        except Exception:
+            logger.warning("Replica %s failed its health check", key, exc_info=True)
+            return False
+
+    def healthy(self, key):
+        healthy, checked_at = self._health.get(key, (None, 0.0))
+        if healthy is not None and time.monotonic() - checked_at < self.interval:
+            return healthy
+        # One probe at a time; concurrent requests use the last result.
+        if not self._lock.acquire(blocking=False):
+            return bool(healthy)
+        try:
+            healthy = self._probe(key)
+            self._set_health(key, healthy)
+            return healthy
+        finally:
+            self._lock.release()
+
+    def choose(self):
+        """A healthy replica engine, or None to use the primary."""
+        candidates = [key for key in self.keys if self.healthy(key)]
+        return self.engines[random.choice(candidates)] if candidates else None
+
+    def sticky(self, user_id):
+        return self.recent_writes.get(f"user:{user_id}") is not None
+
+    def may_be_stale(self):
+        """True when this request reads a replica that may not have the latest write."""
+        return g.get("db_replica") is not None and self.recent_writes.get("last") is not None
+
+    def _record_write(self, response):
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return response
+        if request.endpoint in self.write_exempt:
+            return response
+        self.recent_writes.set("last", 1)
+        user = g.get("current_user")
+        if user is not None:
+            self.recent_writes.set(f"user:{user.id}", 1)
+        return response
+
+    def stats(self):
+        return {
+            "db.replicas.healthy": sum(
+                1 for healthy, _ in self._health.values() if healthy
+            ),
+            "db.replicas.configured": len(self.keys),
+        }
+
+
+replicas = ReplicaRouter()
+
+
+def read_replica(f):
+    """Run a read-only view against a replica when one is usable.
+
+    Apply below ``token_required`` so the principal is known.
+    """
+
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        user = g.get("current_user")
+        replica = None
+        if replicas.keys and not (user is not None and replicas.sticky(user.id)):
+            replica = replicas.choose()
+        g.db_replica = replica
+        metrics.inc("db.reads.replica" if replica is not None else "db.reads.primary")
+        return f(*args, **kwargs)
+
+    return decorated
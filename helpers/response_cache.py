@@ -0,0 +1,169 @@
+import logging
+import time
+import uuid
+
+from flask import Response
+from werkzeug.http import parse_date
+
+from .cache import LocalCache, RedisCache, redis_client
+from .conditional import is_not_modified, not_modified_response
+from .metrics import metrics
+from .replicas import replicas
+
+logger = logging.getLogger(__name__)
+
+CACHED_HEADERS = ("ETag", "Last-Modified", "X-Next-Cursor", "Link")
+
+
+class ResponseCache:
+    """Read-through cache of serialized JSON responses.
+
+    Single items are stored under their own key and deleted when they change.
+    List and search pages are stored under a generation token that any write
+    replaces, which invalidates every page at once without having to find
+    them.
+
+    Each item also has a generation of its own, replaced when the item is
+    invalidated, so a write to one article leaves the others cached. Every
+    entry is stamped with the generation (the item's, or the lists') read
+    before its query ran. ``set`` refuses to store a response whose
+    generation has moved on, and ``get`` ignores entries from an older
+    generation. A slow reader therefore cannot put back data that a
+    concurrent write just invalidated.
+
+    A write only reaches the caches it can see. With a per-process
+    ``local`` backend, other workers would keep serving stale entries. For
+    that reason ``auto`` uses Redis when ``CACHE_REDIS_URL`` is set, the
+    local cache when there is a single worker (``WEB_CONCURRENCY``), and no
+    cache otherwise.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.backend = None
+
+    def init_app(self, app):
+        prefix = f"{self.name.upper()}_CACHE"
+        backend = app.config[f"{prefix}_BACKEND"]
+        ttl = app.config[f"{prefix}_TTL"]
+        workers = app.config["WORKER_PROCESSES"]
+        if backend == "auto":
+            if app.config.get("CACHE_REDIS_URL"):
+                backend = "redis"
+            else:
+                backend = "local" if workers == 1 else "none"
+        elif backend == "local" and workers > 1:
+            logger.warning(
+                "%s_BACKEND=local with %d workers: writes in one worker leave the "
+                "others serving stale entries for up to %ds",
+                prefix,
+                workers,
+                ttl,
+            )
+        if backend == "local":
+            self.backend = LocalCache(app.config[f"{prefix}_SIZE"], ttl)
+        elif backend == "redis":
+            client = redis_client(app.config["CACHE_REDIS_URL"])
+            self.backend = RedisCache(client, ttl, prefix=f"{self.name}:")
+        else:
+            self.backend = None
+        metrics.register_collector(self.stats)
+
+    def _lookup(self, key):
+        start = time.perf_counter()
+        entry = self.backend.get(key)
+        metrics.observe(f"cache.{self.name}.get", time.perf_counter() - start)
+        metrics.inc(f"cache.{self.name}.{'hits' if entry is not None else 'misses'}")
+        return entry
+
+    def _generation_key(self, key):
+        # Items are guarded by their own generation, list pages by a shared one.
+        return f"generation:{key}" if key.startswith("item:") else "generation"
+
+    def _new_generation(self, generation_key):
+        generation = uuid.uuid4().hex
+        if self.backend is not None:
+            # Outlive any entry stored under it, so readers never see a gap.
+            self.backend.set(generation_key, generation, ttl=self.backend.ttl * 2)
+        return generation
+
+    def generation(self, key=None):
+        """The current generation for ``key`` (default: the list pages).
+
+        Read it before querying and pass it to get/set.
+        """
+        if self.backend is None:
+            return None
+        generation_key = self._generation_key(key or "")
+        generation = self.backend.get(generation_key)
+        if generation is None:
+            generation = self._new_generation(generation_key)
+        return generation
+
+    def get(self, key, generation, use_dates=True):
+        """Return the cached response for ``key`` (or a 304 for it), else None."""
+        if self.backend is None:
+            return None
+        entry = self._lookup(key)
+        if entry is None or entry.get("generation") != generation:
+            return None
+
+        headers = entry["headers"]
+        last_modified = None
+        if use_dates and "Last-Modified" in headers:
+            last_modified = parse_date(headers["Last-Modified"])
+        etag = headers["ETag"].strip('"')
+        if is_not_modified(etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        return Response(entry["body"], headers=headers, mimetype="application/json")
+
+    def set(self, key, response, generation):
+        if self.backend is None or response.status_code != 200:
+            return
+        if replicas.may_be_stale():
+            # A lagging replica could otherwise pin pre-write data for a TTL.
+            return
+        if self.backend.get(self._generation_key(key)) != generation:
+            # Something was written since the query ran; its result may be stale.
+            metrics.inc(f"cache.{self.name}.stale_writes")
+            return
+        headers = {h: response.headers[h] for h in CACHED_HEADERS if h in response.headers}
+        self.backend.set(
+            key,
+            {
+                "body": response.get_data(as_text=True),
+                "headers": headers,
+                "generation": generation,
+            },
+        )
+
+    def delete(self, key):
+        if self.backend is not None:
+            self.backend.delete(key)
+
+    def item_key(self, id):
+        return f"item:{id}"
+
+    def list_key(self, args, generation):
+        params = "&".join(f"{k}={v}" for k, v in sorted(args.items(multi=True)))
+        return f"list:{generation}:{params}"
+
+    def invalidate_lists(self):
+        return self._new_generation("generation")
+
+    def invalidate(self, *ids):
+        """Drop the given items and every cached list page."""
+        for id in ids:
+            key = self.item_key(id)
+            self._new_generation(self._generation_key(key))
+            self.delete(key)
+        self.invalidate_lists()
+
+    def stats(self):
+        hits = metrics.counter(f"cache.{self.name}.hits")
+        misses = metrics.counter(f"cache.{self.name}.misses")
+        total = hits + misses
+        return {f"cache.{self.name}.hit_ratio": hits / total if total else 0.0}
+
+
+article_cache = ResponseCache("article")
@@ -0,0 +1,213 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, event, select
+from sqlalchemy.orm import Session
+
+from models import db, RevokedToken
+from models.article import utcnow
+from .metrics import metrics
+
+PENDING_KEY = "pending_revocations"
+
+
+def _timestamp(value):
+    if value.tzinfo is None:  # SQLite drops the offset
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter of strings: no false negatives, rare false positives."""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(capacity, 1)
+        self.size = math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Double hashing: k positions from two halves of one digest.
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+
+class Revocations:
+    """Revoked tokens, mirrored in every worker from the revoked_tokens table.
+
+    A token is revoked by its ``jti``, or all of a user's tokens issued
+    before a point in time are. Lookups check a Bloom filter first, so a
+    token that was never revoked costs a few bit tests and no query; hits
+    are confirmed against the exact set. Each worker pulls new rows every
+    ``REVOCATION_SYNC_INTERVAL`` seconds and reloads everything every
+    ``REVOCATION_FULL_SYNC_INTERVAL``, which also drops entries whose tokens
+    have expired anyway.
+
+    The lookup state (exact sets and filter) is one tuple: a reload builds
+    a new one and swaps it in with a single assignment, so a concurrent
+    ``is_revoked`` never sees it half-filled. Incremental pulls only add
+    entries, to the filter before the exact set. A revocation made here
+    takes effect in this worker once its transaction commits.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ttl = timedelta(hours=24)
+        self.interval = 2.0
+        self.full_interval = 60.0
+        self.capacity = 10000
+        self.reset()
+
+    def init_app(self, app):
+        self.ttl = timedelta(seconds=app.config["TOKEN_TTL"])
+        self.interval = app.config["REVOCATION_SYNC_INTERVAL"]
+        self.full_interval = app.config["REVOCATION_FULL_SYNC_INTERVAL"]
+        self.capacity = app.config["REVOCATION_BLOOM_CAPACITY"]
+        self.reset()
+        metrics.register_collector(self.stats)
+
+    def reset(self):
+        # (jti -> expiry timestamp, user_id -> (revoked_at, expiry), Bloom filter of jtis)
+        self._state = self._build([])
+        self.last_id = 0
+        self.synced_at = None
+        self.full_synced_at = None
+
+    def _build(self, entries):
+        """A fresh lookup state from (jti, user_id, revoked_at, expires_at) entries."""
+        now = time.time()
+        tokens, users = {}, {}
+        for jti, user_id, revoked_at, expires_at in entries:
+            if expires_at <= now:
+                continue
+            if jti is not None:
+                tokens[jti] = expires_at
+            if user_id is not None:
+                previous = users.get(user_id, (0.0, 0.0))
+                users[user_id] = (max(previous[0], revoked_at), max(previous[1], expires_at))
+        bloom = BloomFilter(max(len(tokens) * 2, self.capacity))
+        for jti in tokens:
+            bloom.add(jti)
+        return tokens, users, bloom
+
+    def _entries(self):
+        tokens, users, _ = self._state
+        for jti, expires_at in tokens.items():
+            yield jti, None, 0.0, expires_at
+        for user_id, (revoked_at, expires_at) in users.items():
+            yield None, user_id, revoked_at, expires_at
+
+    def _add(self, jti, user_id, revoked_at, expires_at):
+        tokens, users, bloom = self._state
+        if jti is not None and jti not in tokens:
+            if bloom.count >= bloom.capacity:
+                entries = list(self._entries()) + [(jti, user_id, revoked_at, expires_at)]
+                self._state = self._build(entries)
+                return
+            bloom.add(jti)  # before the exact set, so a reader never misses it
+        if jti is not None:
+            tokens[jti] = expires_at
+        if user_id is not None:
+            previous = users.get(user_id, (0.0, 0.0))
+            users[user_id] = (max(previous[0], revoked_at), max(previous[1], expires_at))
+
+    def sync(self, force=False):
+        now = time.monotonic()
+        if not force and self.synced_at is not None and now - self.synced_at < self.interval:
+            return
+        if not self._lock.acquire(blocking=False):
+            return  # another thread is syncing
+        try:
+            # Rows can commit out of id order, so a periodic full reload also
+            # picks up any that an incremental pull skipped.
+            full = force or self.full_synced_at is None or now - self.full_synced_at >= self.full_interval
+            query = select(
+                RevokedToken.id,
+                RevokedToken.jti,
+                RevokedToken.user_id,
+                RevokedToken.revoked_at,
+                RevokedToken.expires_at,
+            ).where(RevokedToken.expires_at > utcnow())
+            if not full:
+                query = query.where(RevokedToken.id > self.last_id)
+            rows = db.session.execute(query).all()
+            entries = [
+                (row.jti, row.user_id, _timestamp(row.revoked_at), _timestamp(row.expires_at))
+                for row in rows
+            ]
+            if full:
+                self._state = self._build(entries)
+                self.full_synced_at = now
+            else:
+                for entry in entries:
+                    self._add(*entry)
+            self.last_id = max([self.last_id] + [row.id for row in rows])
+            self.synced_at = now
+            metrics.inc("auth.revocations.syncs")
+        finally:
+            self._lock.release()
+
+    def is_revoked(self, payload):
+        self.sync()
+        tokens, users, bloom = self._state
+        jti = payload.get("jti")
+        if jti is not None and jti in bloom and jti in tokens:
+            return True
+        user = users.get(payload["user_id"])
+        return user is not None and payload.get("iat", 0) <= user[0]
+
+    def _store(self, jti=None, user_id=None, expires_at=None):
+        revoked_at = utcnow()
+        expires_at = expires_at or revoked_at + self.ttl
+        db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= revoked_at))
+        db.session.add(
+            RevokedToken(jti=jti, user_id=user_id, revoked_at=revoked_at, expires_at=expires_at)
+        )
+        # Applied by _apply_committed, so a failed commit leaves nothing behind.
+        db.session.info.setdefault(PENDING_KEY, []).append(
+            (jti, user_id, revoked_at.timestamp(), expires_at.timestamp())
+        )
+
+    def revoke_token(self, payload):
+        """Revoke one token once the current transaction commits."""
+        expires_at = datetime.fromtimestamp(payload["exp"], timezone.utc)
+        self._store(jti=payload["jti"], expires_at=expires_at)
+
+    def revoke_user(self, user_id):
+        """Revoke every token issued to ``user_id`` so far, once the transaction commits."""
+        self._store(user_id=user_id)
+
+    def stats(self):
+        tokens, users, _ = self._state
+        return {
+            "auth.revocations.tokens": len(tokens),
+            "auth.revocations.users": len(users),
+        }
+
+
+revocations = Revocations()
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed(session):
+    for entry in session.info.pop(PENDING_KEY, ()):
+        revocations._add(*entry)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop(PENDING_KEY, None)
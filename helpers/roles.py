@@ -0,0 +1,98 @@
+import logging
+import threading
+import time
+
+from sqlalchemy import event, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from models import db, Role
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class RoleRegistry:
+    """The roles table, held in memory by every worker.
+
+    Roles are a handful of rows that almost never change, so routes,
+    scripts and ``token_required`` map between names and ids here instead of
+    querying or lazy-loading ``User.role``. The registry is loaded at
+    startup and reloaded when:
+
+    - a role is written through the ORM in this process;
+    - an id is looked up that it does not know (it must exist, since it came
+      from the database);
+    - ``ROLE_REFRESH_INTERVAL`` seconds have passed, which picks up changes
+      made by other workers.
+
+    Unknown names do not trigger a reload, so user input cannot force a
+    query per request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.interval = 60.0
+        self.reset()
+
+    def init_app(self, app):
+        self.interval = app.config["ROLE_REFRESH_INTERVAL"]
+        self.reset()
+        with app.app_context():
+            try:
+                self.load()
+            except SQLAlchemyError:
+                # Not migrated yet; the first lookup loads it.
+                logger.info("Roles table not available, loading roles lazily")
+                db.session.rollback()
+        metrics.register_collector(self.stats)
+
+    def reset(self):
+        self.by_id = {}
+        self.by_name = {}
+        self.loaded_at = None
+
+    def load(self):
+        rows = db.session.execute(select(Role.id, Role.name)).all()
+        with self._lock:
+            self.by_id = {row.id: row.name for row in rows}
+            self.by_name = {row.name: row.id for row in rows}
+            self.loaded_at = time.monotonic()
+        metrics.inc("roles.loads")
+
+    def invalidate(self):
+        self.loaded_at = None
+
+    def _fresh(self):
+        if self.loaded_at is None or time.monotonic() - self.loaded_at >= self.interval:
+            self.load()
+
+    def id(self, name):
+        """The id of the role called ``name``, or None if there is none."""
+        self._fresh()
+        return self.by_name.get(name)
+
+    def name(self, role_id):
+        """The name of role ``role_id``, or None if there is none."""
+        self._fresh()
+        if role_id not in self.by_id:
+            self.load()
+        return self.by_id.get(role_id)
+
+    def names(self):
+        self._fresh()
+        return sorted(self.by_name)
+
+    def stats(self):
+        return {"roles.count": len(self.by_id)}
+
+
+roles = RoleRegistry()
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_roles(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Role):
+            roles.invalidate()
+            return
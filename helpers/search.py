@@ -0,0 +1,76 @@
+from flask import current_app
+from sqlalchemy import case, cast, func, literal_column
+
+from models import db, Article
+
+
+class SearchBackend:
+    """Filters and ranks article queries for a search term.
+
+    ``match`` returns a WHERE clause and a float rank expression. Results are
+    ordered by rank (best first) and then by id, and both are used as keyset
+    pagination keys.
+    """
+
+    def match(self, term):
+        raise NotImplementedError
+
+    def search(self, query, term):
+        condition, rank = self.match(term)
+        keys = [("rank", rank, True), ("id", Article.id, False)]
+        return query.filter(condition).add_columns(rank.label("rank")), keys
+
+
+class PostgresSearch(SearchBackend):
+    """Full-text search backed by the ``ix_articles_search`` GIN index.
+
+    The document expression must stay identical to the one in the index
+    migration, otherwise Postgres falls back to a sequential scan.
+    """
+
+    language = "english"
+
+    def document(self):
+        return func.to_tsvector(
+            literal_column(f"'{self.language}'::regconfig"),
+            Article.title + literal_column("' '") + Article.content,
+        )
+
+    def match(self, term):
+        document = self.document()
+        tsquery = func.websearch_to_tsquery(
+            literal_column(f"'{self.language}'::regconfig"), term
+        )
+        # ts_rank_cd returns a real; widen it so cursors round-trip exactly.
+        rank = cast(func.ts_rank_cd(document, tsquery), db.Float(precision=53))
+        return document.op("@@")(tsquery), rank
+
+
+class LikeSearch(SearchBackend):
+    """Substring search for databases without full-text support (SQLite).
+
+    Title matches rank above content-only matches.
+    """
+
+    def match(self, term):
+        pattern = f"%{term}%"
+        in_title = Article.title.ilike(pattern)
+        rank = case((in_title, 2.0), else_=1.0)
+        return in_title | Article.content.ilike(pattern), rank
+
+
+BACKENDS = {
+    "postgres": PostgresSearch,
+    "like": LikeSearch,
+}
+
+
+def register_search_backend(name, backend_class):
+    BACKENDS[name] = backend_class
+
+
+def get_search_backend():
+    name = current_app.config["SEARCH_BACKEND"]
+    if name == "auto":
+        name = "postgres" if db.engine.dialect.name == "postgresql" else "like"
+    return BACKENDS[name]()
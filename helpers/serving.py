@@ -0,0 +1,74 @@
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+SERVER_MODES = ("sync", "gevent")
+
+
+def gevent_active():
+    """True when gevent has monkey-patched the standard library (``gunicorn -k gevent``)."""
+    monkey = sys.modules.get("gevent.monkey")  # patching imports it; importing gevent is slow
+    return monkey is not None and monkey.is_module_patched("socket")
+
+
+def resolve_server_mode(app):
+    mode = app.config["SERVER_MODE"]
+    if mode == "auto":
+        return "gevent" if gevent_active() else "sync"
+    if mode not in SERVER_MODES:
+        raise RuntimeError(f"Unknown SERVER_MODE: {mode}")
+    if mode == "gevent" and not gevent_active():
+        raise RuntimeError("SERVER_MODE=gevent needs a gevent worker (gunicorn -k gevent)")
+    return mode
+
+
+def _gevent_wait_callback(conn, timeout=None):
+    # Same loop as psycogreen: let psycopg2 run in non-blocking mode and
+    # park the greenlet on the socket instead of blocking the worker.
+    from gevent.socket import wait_read, wait_write
+    from psycopg2 import OperationalError, extensions
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(conn.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(conn.fileno(), timeout=timeout)
+        else:
+            raise OperationalError(f"Bad result from poll: {state!r}")
+
+
+def patch_psycopg():
+    """Make psycopg2 cooperative, so a greenlet waiting on Postgres yields."""
+    try:
+        from psycopg2 import extensions
+    except ImportError:
+        return
+    extensions.set_wait_callback(_gevent_wait_callback)
+
+
+def init_serving(app):
+    """Adapt the app to the worker type it is served by.
+
+    Under gevent every request is a greenlet: psycopg2 waits cooperatively,
+    password hashing moves to gevent's pool of real threads, and the database
+    pool should be sized for ``worker_connections`` rather than for threads.
+    """
+    mode = resolve_server_mode(app)
+    app.config["SERVER_MODE"] = mode
+    if mode != "gevent":
+        return
+    patch_psycopg()
+    options = app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+    if "pool_size" in options:
+        capacity = options["pool_size"] + options["max_overflow"]
+        if capacity < app.config["GEVENT_WORKER_CONNECTIONS"]:
+            logger.warning(
+                "Database pool holds %d connections for %d concurrent greenlets; "
+                "requests will queue on the pool (raise DB_POOL_SIZE or use PgBouncer)",
+                capacity,
+                app.config["GEVENT_WORKER_CONNECTIONS"],
+            )
@@ -2,11 +2,8 @@ import os
 from logging.config import fileConfig
 from sqlalchemy import engine_from_config, pool
 from alembic import context
+# Importing the app loads .env (see config.py); no app is created.
 from app import db
-from dotenv import load_dotenv
-
-# Load environment variables from the .env file
-load_dotenv()
 
 # This sets the target_metadata for autogeneration
 target_metadata = db.metadata
@@ -0,0 +1,28 @@
+"""Index article_changes.changed_at for pruning
+
+Revision ID: 2a7c5d9e4b16
+Revises: 9d3a6b2e8f41
+Create Date: 2026-10-18 21:12:40.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2a7c5d9e4b16'
+down_revision: Union[str, None] = '9d3a6b2e8f41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        op.f('ix_article_changes_changed_at'), 'article_changes', ['changed_at'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_article_changes_changed_at'), table_name='article_changes')
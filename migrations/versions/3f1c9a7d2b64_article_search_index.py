@@ -0,0 +1,35 @@
+"""Article full-text search index
+
+Revision ID: 3f1c9a7d2b64
+Revises: 486e929fb819
+Create Date: 2026-10-18 10:12:41.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b64'
+down_revision: Union[str, None] = '486e929fb819'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Postgres only: other databases use the LIKE search backend.
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    # Must match PostgresSearch.document() in helpers/search.py.
+    op.execute(
+        "CREATE INDEX ix_articles_search ON articles USING gin "
+        "(to_tsvector('english'::regconfig, title || ' ' || content))"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP INDEX IF EXISTS ix_articles_search")
@@ -0,0 +1,45 @@
+"""Delete a user's articles in the database when the user is deleted
+
+Revision ID: 6f1e3b8a9c52
+Revises: 2a7c5d9e4b16
+Create Date: 2026-10-18 22:04:51.902377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f1e3b8a9c52'
+down_revision: Union[str, None] = '2a7c5d9e4b16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The initial migration left the constraint unnamed. PostgreSQL named it
+# articles_user_id_fkey; on SQLite, batch mode names it by this convention
+# so it can be dropped and the table rebuilt.
+SQLITE_NAMING = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+
+def _replace_foreign_key(ondelete):
+    if op.get_bind().dialect.name == "sqlite":
+        with op.batch_alter_table("articles", naming_convention=SQLITE_NAMING) as batch_op:
+            batch_op.drop_constraint("fk_articles_user_id_users", type_="foreignkey")
+            batch_op.create_foreign_key(
+                "fk_articles_user_id_users", "users", ["user_id"], ["id"], ondelete=ondelete
+            )
+    else:
+        op.drop_constraint("articles_user_id_fkey", "articles", type_="foreignkey")
+        op.create_foreign_key(
+            "articles_user_id_fkey", "articles", "users", ["user_id"], ["id"], ondelete=ondelete
+        )
+
+
+def upgrade() -> None:
+    _replace_foreign_key("CASCADE")
+
+
+def downgrade() -> None:
+    _replace_foreign_key(None)
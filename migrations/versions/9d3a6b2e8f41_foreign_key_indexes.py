@@ -0,0 +1,49 @@
+"""Foreign key and lookup indexes
+
+Revision ID: 9d3a6b2e8f41
+Revises: 5e0b8f3a1c77
+Create Date: 2026-10-18 18:03:27.640115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3a6b2e8f41'
+down_revision: Union[str, None] = '5e0b8f3a1c77'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_articles_user_id'), 'articles', ['user_id'], unique=False)
+    op.create_index(op.f('ix_users_role_id'), 'users', ['role_id'], unique=False)
+
+    # roles.name was never unique: point users at the first role of each
+    # name and drop the duplicates before adding the unique index.
+    op.execute(
+        "UPDATE users SET role_id = ("
+        "SELECT MIN(r2.id) FROM roles r2 JOIN roles r ON r.name = r2.name "
+        "WHERE r.id = users.role_id)"
+    )
+    op.execute("DELETE FROM roles WHERE id NOT IN (SELECT MIN(id) FROM roles GROUP BY name)")
+    op.create_index(op.f('ix_roles_name'), 'roles', ['name'], unique=True)
+
+    # Postgres only: lets the users search (username ILIKE '%term%') use an
+    # index instead of scanning the table.
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(
+            "CREATE INDEX ix_users_username_trgm ON users USING gin (username gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_users_username_trgm")
+    op.drop_index(op.f('ix_roles_name'), table_name='roles')
+    op.drop_index(op.f('ix_users_role_id'), table_name='users')
+    op.drop_index(op.f('ix_articles_user_id'), table_name='articles')
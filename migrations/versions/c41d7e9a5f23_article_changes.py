@@ -0,0 +1,32 @@
+"""Article change log
+
+Revision ID: c41d7e9a5f23
+Revises: 8b2e4c61d0fa
+Create Date: 2026-10-18 15:40:03.118272
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d7e9a5f23'
+down_revision: Union[str, None] = '8b2e4c61d0fa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('article_changes',
+    sa.Column('seq', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+    sa.Column('article_id', sa.Integer(), nullable=False),
+    sa.Column('op', sa.String(length=10), nullable=False),
+    sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.PrimaryKeyConstraint('seq')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('article_changes')
@@ -1,8 +1,12 @@
 from flask_sqlalchemy import SQLAlchemy
 
+from .session import RoutingSession
 
-db = SQLAlchemy()
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 from .user import User
 from .role import Role
 from .article import Article
+from .article_change import ArticleChange, record_changes
+from .revoked_token import RevokedToken
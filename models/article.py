@@ -1,18 +1,112 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from flask import current_app
+
 from . import db
+from .user import User
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+def make_etag(*parts):
+    raw = json.dumps(parts, default=str, separators=(",", ":")).encode()
+    return hashlib.blake2b(raw, digest_size=12).hexdigest()
 
 
 class Article(db.Model):
     __tablename__ = "articles"
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
-    content = db.Column(db.Text, nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    user = db.relationship("User", backref=db.backref("articles", lazy=True))
+    # Bodies dominate row size; load them only when they are asked for.
+    content = db.deferred(db.Column(db.Text, nullable=False))
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        default=utcnow,
+        onupdate=utcnow,
+        server_default=db.func.now(),
+    )
+    version = db.Column(db.Integer, nullable=False, server_default="1")
+    # Deleting a user deletes their articles in the database (ON DELETE
+    # CASCADE). The ORM leaves them alone, loaded or not: it neither loads
+    # them to delete them nor tries to clear their user_id.
+    user = db.relationship(
+        "User",
+        backref=db.backref("articles", lazy=True, passive_deletes="all"),
+    )
+
+    # Every UPDATE bumps version and checks the old value, so concurrent
+    # writers fail with StaleDataError instead of silently overwriting.
+    __mapper_args__ = {"version_id_col": version}
+
+    @property
+    def author(self):
+        return self.user.username
+
+    FIELDS = ("id", "title", "content", "content_preview", "author")
+    DEFAULT_FIELDS = ("id", "title", "content", "author")
+
+    @classmethod
+    def parse_fields(cls, value):
+        """Parse a ``fields=title,author`` argument; ``id`` is always included."""
+        if not value:
+            return cls.DEFAULT_FIELDS
+        fields = [f.strip() for f in value.split(",") if f.strip()]
+        unknown = [f for f in fields if f not in cls.FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return tuple(f for f in cls.FIELDS if f == "id" or f in fields)
+
+    @classmethod
+    def rows(cls, fields=DEFAULT_FIELDS):
+        """Query article columns plus the author name in a single SELECT.
+
+        Rows expose the same attributes as an Article (``author`` included),
+        so they can go straight to ``serialize`` without loading ``User``.
+        Only the requested ``fields`` are selected, on top of the columns
+        needed for validators and paging; ``content_preview`` is truncated by
+        the database so the full body never leaves it.
+        """
+        columns = [cls.id, cls.version, cls.updated_at, User.username.label("author")]
+        if "title" in fields:
+            columns.append(cls.title)
+        if "content" in fields:
+            columns.append(cls.content)
+        if "content_preview" in fields:
+            length = current_app.config["ARTICLE_PREVIEW_LENGTH"]
+            columns.append(db.func.substr(cls.content, 1, length).label("content_preview"))
+        return db.session.query(*columns).join(User, cls.user_id == User.id)
+
+    @staticmethod
+    def serialize(row, fields=DEFAULT_FIELDS):
+        return {field: getattr(row, field) for field in fields}
 
     def to_dict(self):
-        return {
-            "id": self.id,
-            "title": self.title,
-            "content": self.content,
-            "author": self.user.username,
-        }
+        return Article.serialize(self)
+
+    @staticmethod
+    def etag(row, *extra):
+        """Strong ETag of the serialized article, without serializing it.
+
+        Pass the selected fields as ``extra`` when they are not the default,
+        since each representation needs its own tag.
+        """
+        return make_etag(row.id, row.version, row.author, *extra)
+
+    @staticmethod
+    def list_etag(rows, *extra):
+        return make_etag(*extra, [(row.id, row.version, row.author) for row in rows])
+
+    @staticmethod
+    def last_modified(row):
+        updated_at = row.updated_at
+        if updated_at.tzinfo is None:  # SQLite drops the offset
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+        return updated_at
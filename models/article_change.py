@@ -0,0 +1,77 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import db
+from .article import Article, utcnow
+
+
+class ArticleChange(db.Model):
+    """Append-only log of article writes, read by the changes feed.
+
+    There is deliberately no foreign key to articles: delete tombstones
+    outlive the rows they refer to. Entries older than ``CHANGES_RETENTION``
+    are removed by ``python -m scripts.prune_changes``.
+    """
+
+    __tablename__ = "article_changes"
+    seq = db.Column(
+        db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True
+    )
+    article_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)
+    changed_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        default=utcnow,
+        server_default=db.func.now(),
+        index=True,
+    )
+
+
+PENDING_KEY = "pending_article_changes"
+
+
+def record_changes(session, changes):
+    """Log ``(article_id, op)`` pairs when ``session``'s transaction commits."""
+    if changes:
+        session.info.setdefault(PENDING_KEY, []).extend(changes)
+
+
+@event.listens_for(Session, "before_commit")
+def _write_article_changes(session):
+    # Flush first: the flush commit() would run next can log more changes.
+    session.flush()
+    changes = session.info.pop(PENDING_KEY, None)
+    if not changes:
+        return
+    connection = session.connection()
+    if connection.dialect.name == "postgresql":
+        # Sequence numbers come out in commit order, so readers never skip a
+        # late commit, only if taking them and committing happen under one
+        # lock. It is held from here to the commit, not while the writes ran.
+        connection.exec_driver_sql("SELECT pg_advisory_xact_lock(727001)")
+    now = utcnow()
+    connection.execute(
+        ArticleChange.__table__.insert(),
+        [{"article_id": id, "op": op, "changed_at": now} for id, op in changes],
+    )
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_article_changes(session):
+    session.info.pop(PENDING_KEY, None)
+
+
+@event.listens_for(Session, "after_flush")
+def _log_article_changes(session, flush_context):
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, Article):
+            changes.append((obj.id, "create"))
+    for obj in session.dirty:
+        if isinstance(obj, Article) and session.is_modified(obj, include_collections=False):
+            changes.append((obj.id, "update"))
+    for obj in session.deleted:
+        if isinstance(obj, Article):
+            changes.append((obj.id, "delete"))
+    record_changes(session, changes)
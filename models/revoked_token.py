@@ -0,0 +1,17 @@
+from . import db
+from .article import utcnow
+
+
+class RevokedToken(db.Model):
+    """A revoked token (``jti``) or every token a user got before ``revoked_at``.
+
+    Rows are only needed until the tokens they cover would have expired on
+    their own, which is ``expires_at``.
+    """
+
+    __tablename__ = "revoked_tokens"
+    id = db.Column(db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True)
+    jti = db.Column(db.String(64), nullable=True)
+    user_id = db.Column(db.Integer, nullable=True)
+    revoked_at = db.Column(db.DateTime(timezone=True), nullable=False, default=utcnow)
+    expires_at = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
@@ -3,4 +3,4 @@ from . import db
 class Role(db.Model):
     __tablename__ = "roles"
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(50), nullable=False)
\ No newline at end of file
+    name = db.Column(db.String(50), nullable=False, unique=True, index=True)
\ No newline at end of file
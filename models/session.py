@@ -0,0 +1,23 @@
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+
+
+class RoutingSession(Session):
+    """Session that sends plain SELECTs to the request's read replica.
+
+    A request opts in by setting ``g.db_replica`` to a replica engine (see
+    ``helpers.replicas.read_replica``). Flushes, DML and raw SQL always go to
+    the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and getattr(clause, "is_select", False)
+            and has_app_context()
+        ):
+            replica = g.get("db_replica")
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
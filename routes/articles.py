@@ -1,12 +1,51 @@
-from flask import Blueprint, jsonify, request, g
-from sqlalchemy.orm import Session
+import json
+import time
+from datetime import datetime, timezone
 
-from models import db, Article
-from helpers import token_required
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    request,
+    g,
+    stream_with_context,
+)
+from sqlalchemy.orm.exc import StaleDataError
+
+from models import db, Article, ArticleChange, User, record_changes
+from helpers import (
+    token_required,
+    read_replica,
+    InvalidPageRequest,
+    page_args,
+    paginate,
+    split_page,
+    add_page_links,
+    rows_response,
+    get_search_backend,
+    is_not_modified,
+    precondition_failed,
+    add_validators,
+    not_modified_response,
+    article_cache,
+    stream_rows,
+    EXPORT_FORMATS,
+    rate_limit,
+    admission,
+    busy_response,
+    list_cost,
+    bulk_cost,
+    COST_GET,
+    COST_WRITE,
+    COST_EXPORT,
+)
 
 
 bp = Blueprint("articles", __name__)
 
+PAGE_KEYS = [("id", Article.id, False)]
+
 
 def has_permission_to_edit(article):
     return g.current_role in ["admin", "editor"] or article.user_id == g.current_user.id
@@ -22,35 +61,218 @@ def success_response(message, status_code=200):
 
 @bp.route("/articles", methods=["GET"])
 @token_required
+@rate_limit(list_cost)
+@read_replica
 def get_articles():
+    generation = article_cache.generation()
+    cache_key = article_cache.list_key(request.args, generation)
+    cached = article_cache.get(cache_key, generation, use_dates=False)
+    if cached is not None:
+        return cached
+
+    try:
+        fields = Article.parse_fields(request.args.get("fields"))
+    except ValueError as e:
+        return error_response(str(e), 400)
+
     search_term = request.args.get("q", "")
-    if not search_term:
-        articles = db.session.query(Article).all()
-    else:
-        articles = (
-            db.session.query(Article)
-            .filter(
-                (Article.title.ilike(f"%{search_term}%"))
-                | (Article.content.ilike(f"%{search_term}%"))
-            )
-            .all()
+    query, keys = Article.rows(fields), PAGE_KEYS
+    if search_term:
+        query, keys = get_search_backend().search(query, search_term)
+
+    try:
+        limit, after = page_args(keys)
+    except InvalidPageRequest as e:
+        return error_response(str(e), 400)
+
+    articles, next_cursor = split_page(
+        paginate(query, keys, limit, after).all(), keys, limit
+    )
+
+    # Deletions don't move any updated_at, so lists only honour If-None-Match.
+    etag = Article.list_etag(articles, next_cursor, fields)
+    last_modified = max((Article.last_modified(a) for a in articles), default=None)
+    if is_not_modified(etag):
+        return not_modified_response(etag, last_modified)
+
+    response = add_page_links(rows_response(articles, fields), next_cursor)
+    add_validators(response, etag, last_modified)
+    article_cache.set(cache_key, response, generation)
+    return response, 200
+
+
+@bp.route("/articles/export", methods=["GET"])
+@token_required
+@rate_limit(COST_EXPORT)
+def export_articles():
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return error_response(f"Unsupported format: {fmt}", 400)
+
+    try:
+        fields = Article.parse_fields(request.args.get("fields"))
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    query = Article.rows(fields)
+    search_term = request.args.get("q", "")
+    if search_term:
+        condition, _ = get_search_backend().match(search_term)
+        query = query.filter(condition)
+    if request.args.get("author"):
+        query = query.filter(User.username == request.args["author"])
+    try:
+        # Rows are exported in id order, so an interrupted export resumes
+        # from the last id it received.
+        after = _int_arg(request.args.get("after"))
+        updated_since = _datetime_arg(request.args.get("updated_since"))
+    except ValueError as e:
+        return error_response(str(e), 400)
+    if after is not None:
+        query = query.filter(Article.id > after)
+    if updated_since is not None:
+        query = query.filter(Article.updated_at >= updated_since)
+
+    query = query.order_by(Article.id).yield_per(current_app.config["EXPORT_BATCH_SIZE"])
+    return stream_rows(
+        query,
+        fmt,
+        lambda row: Article.serialize(row, fields),
+        fields,
+        "articles",
+    )
+
+
+def _int_arg(value):
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError("Invalid after")
+
+
+def _datetime_arg(value):
+    if value is None:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError("Invalid updated_since")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _changes_since(since, limit):
+    rows = (
+        db.session.query(
+            ArticleChange.seq,
+            ArticleChange.op,
+            ArticleChange.article_id,
+            Article.id,
+            Article.title,
+            Article.content,
+            User.username.label("author"),
         )
+        .outerjoin(Article, Article.id == ArticleChange.article_id)
+        .outerjoin(User, User.id == Article.user_id)
+        .filter(ArticleChange.seq > since)
+        .order_by(ArticleChange.seq)
+        .limit(limit + 1)
+        .all()
+    )
+    # End the transaction so the next poll sees newly committed changes.
+    db.session.rollback()
+    return [
+        {
+            "seq": row.seq,
+            "op": row.op,
+            "id": row.article_id,
+            # The current state, or None once the article is gone.
+            "article": Article.serialize(row) if row.id is not None else None,
+        }
+        for row in rows[:limit]
+    ], len(rows) > limit
+
+
+def _changes_pruned(since):
+    """True if entries after ``since`` may already have been pruned."""
+    if not since:
+        return False
+    oldest = db.session.query(db.func.min(ArticleChange.seq)).scalar()
+    return oldest is not None and since < oldest - 1
+
+
+def _sse_changes(since, limit):
+    config = current_app.config
+    deadline = time.monotonic() + config["CHANGES_STREAM_TIMEOUT"]
+    yield "retry: 1000\n\n"
+    while time.monotonic() < deadline:
+        changes, has_more = _changes_since(since, limit)
+        for change in changes:
+            since = change["seq"]
+            yield f"id: {since}\nevent: change\ndata: {json.dumps(change)}\n\n"
+        if not has_more:
+            yield ": keep-alive\n\n"
+            time.sleep(config["CHANGES_POLL_INTERVAL"])
+
+
+@bp.route("/articles/changes", methods=["GET"])
+@token_required
+@rate_limit(COST_GET)
+def get_article_changes():
+    config = current_app.config
+    since = request.args.get("since") or request.headers.get("Last-Event-ID") or 0
+    try:
+        since = int(since)
+        limit = min(int(request.args.get("limit", config["PAGE_SIZE_DEFAULT"])), config["PAGE_SIZE_MAX"])
+        wait = min(float(request.args.get("wait", 0)), config["CHANGES_MAX_WAIT"])
+    except ValueError:
+        return error_response("Invalid since, limit or wait.", 400)
+    if limit < 1:
+        return error_response("Invalid since, limit or wait.", 400)
+    if _changes_pruned(since):
+        return error_response("Changes since then have been pruned; reload the articles.", 410)
+
+    # Streams and long polls hold a thread while they wait, so only a few
+    # may run at once (CHANGES_MAX_WAITERS).
+    if request.accept_mimetypes.best == "text/event-stream":
+        if not admission.begin_wait():
+            return busy_response()
+        response = Response(
+            stream_with_context(_sse_changes(since, limit)),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+        response.call_on_close(admission.end_wait)
+        return response
+
+    # Long poll: hold the request until something changes or ``wait`` runs
+    # out. Without a free wait slot, answer at once like a plain poll.
+    waiting = wait > 0 and admission.begin_wait()
+    try:
+        deadline = time.monotonic() + (wait if waiting else 0)
+        changes, has_more = _changes_since(since, limit)
+        while not changes and time.monotonic() < deadline:
+            time.sleep(min(config["CHANGES_POLL_INTERVAL"], max(deadline - time.monotonic(), 0)))
+            changes, has_more = _changes_since(since, limit)
+    finally:
+        if waiting:
+            admission.end_wait()
 
     return jsonify(
-        [
-            {
-                "id": a.id,
-                "title": a.title,
-                "content": a.content,
-                "author": a.user.username,
-            }
-            for a in articles
-        ]
+        {
+            "changes": changes,
+            "next_since": changes[-1]["seq"] if changes else since,
+            "has_more": has_more,
+        }
     ), 200
 
 
 @bp.route("/articles", methods=["POST"])
 @token_required
+@rate_limit(COST_WRITE)
 def create_article():
     data = request.get_json()
     title = data.get("title")
@@ -62,6 +284,7 @@ def create_article():
     new_article = Article(title=title, content=content, user_id=g.current_user.id)
     db.session.add(new_article)
     db.session.commit()
+    article_cache.invalidate()
 
     return jsonify(
         {"message": "Article created successfully", "id": new_article.id}
@@ -70,23 +293,43 @@ def create_article():
 
 @bp.route("/articles/<int:id>", methods=["GET"])
 @token_required
+@rate_limit(COST_GET)
+@read_replica
 def get_article_by_id(id):
-    article = db.session.get(Article, id)
+    try:
+        fields = Article.parse_fields(request.args.get("fields"))
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    # Only the full representation is cached: it is the one that writes
+    # invalidate by key.
+    full = fields == Article.DEFAULT_FIELDS
+    cache_key = article_cache.item_key(id)
+    generation = article_cache.generation(cache_key)
+    cached = article_cache.get(cache_key, generation) if full else None
+    if cached is not None:
+        return cached
+
+    article = Article.rows(fields).filter(Article.id == id).first()
     if not article:
         return error_response("Article not found.", 404)
 
-    return jsonify(
-        {
-            "id": article.id,
-            "title": article.title,
-            "content": article.content,
-            "author": article.user.username,
-        }
-    ), 200
+    etag = Article.etag(article) if full else Article.etag(article, fields)
+    last_modified = Article.last_modified(article)
+    if is_not_modified(etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    response = add_validators(
+        jsonify(Article.serialize(article, fields)), etag, last_modified
+    )
+    if full:
+        article_cache.set(cache_key, response, generation)
+    return response, 200
 
 
 @bp.route("/articles/<int:id>", methods=["PUT"])
 @token_required
+@rate_limit(COST_WRITE)
 def update_article(id):
     article = db.session.get(Article, id)
     if not article:
@@ -95,15 +338,27 @@ def update_article(id):
     if not has_permission_to_edit(article):
         return error_response("Permission denied.")
 
-    article.title = request.json.get("title", article.title)
-    article.content = request.json.get("content", article.content)
+    if precondition_failed(lambda: Article.etag(article)):
+        return error_response("Article has been modified.", 412)
 
-    db.session.commit()
+    # Assign only what was sent, so an unchanged body is never loaded.
+    if "title" in request.json:
+        article.title = request.json["title"]
+    if "content" in request.json:
+        article.content = request.json["content"]
+
+    try:
+        db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        return error_response("Article was modified concurrently.", 409)
+    article_cache.invalidate(id)
     return success_response("Article updated successfully")
 
 
 @bp.route("/articles/<int:id>", methods=["DELETE"])
 @token_required
+@rate_limit(COST_WRITE)
 def delete_article(id):
     article = db.session.get(Article, id)
     if not article:
@@ -112,6 +367,192 @@ def delete_article(id):
     if not has_permission_to_edit(article):
         return error_response("Permission denied.")
 
+    if precondition_failed(lambda: Article.etag(article)):
+        return error_response("Article has been modified.", 412)
+
     db.session.delete(article)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        return error_response("Article was modified concurrently.", 409)
+    article_cache.invalidate(id)
     return success_response("Article deleted successfully")
+
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _text_error(operation, required):
+    """Why ``operation``'s title and content are unusable, or None."""
+    values = [operation.get("title"), operation.get("content")]
+    if required and not all(values):
+        return "Title and content are required."
+    if not all(value is None or isinstance(value, str) for value in values):
+        return "Title and content must be strings."
+    return None
+
+
+def _execute_each(statement, params):
+    """Run ``statement`` once per parameter set; False unless each matched one row."""
+    if db.session.connection().dialect.supports_sane_multi_rowcount:
+        return db.session.execute(statement, params).rowcount == len(params)
+    return all(db.session.execute(statement, p).rowcount == 1 for p in params)
+
+
+def _bulk_result(index, op, status, id=None, error=None):
+    result = {"index": index, "op": op, "status": status}
+    if id is not None:
+        result["id"] = id
+    if error is not None:
+        result["error"] = error
+    return result
+
+
+@bp.route("/articles/bulk", methods=["POST"])
+@token_required
+@rate_limit(bulk_cost)
+def bulk_articles():
+    operations = request.get_json()
+    if not isinstance(operations, list):
+        return error_response("Expected a JSON array of operations.", 400)
+    if len(operations) > current_app.config["BULK_MAX_OPERATIONS"]:
+        return error_response("Too many operations.", 413)
+
+    results = [None] * len(operations)
+    creates, updates, deletes = [], [], []
+    for index, operation in enumerate(operations):
+        op = operation.get("op") if isinstance(operation, dict) else None
+        if op == "create":
+            error = _text_error(operation, required=True)
+            if error:
+                results[index] = _bulk_result(index, op, 400, error=error)
+            else:
+                creates.append(index)
+        elif op in ("update", "delete"):
+            error = None if _is_id(operation.get("id")) else "id is required."
+            if error is None and op == "update":
+                error = _text_error(operation, required=False)
+            if error:
+                results[index] = _bulk_result(index, op, 400, error=error)
+            else:
+                (updates if op == "update" else deletes).append(index)
+        else:
+            results[index] = _bulk_result(index, op, 400, error="Unknown operation.")
+
+    # One locked read of ownership and versions for every id touched, instead
+    # of a lookup and permission check per article.
+    ids = {operations[i]["id"] for i in updates + deletes}
+    current = {}
+    if ids:
+        rows = db.session.execute(
+            db.select(Article.id, Article.user_id, Article.version)
+            .where(Article.id.in_(ids))
+            .with_for_update()
+        )
+        current = {row.id: row for row in rows}
+
+    privileged = g.current_role in ["admin", "editor"]
+    touched = set()
+
+    def check(index):
+        operation = operations[index]
+        row = current.get(operation["id"])
+        if row is None or operation["id"] in touched:
+            error = "Article not found." if row is None else "Duplicate id."
+            results[index] = _bulk_result(
+                index, operation["op"], 404 if row is None else 400, operation["id"], error
+            )
+            return None
+        if not privileged and row.user_id != g.current_user.id:
+            results[index] = _bulk_result(
+                index, operation["op"], 403, row.id, "Permission denied."
+            )
+            return None
+        if "version" in operation and operation["version"] != row.version:
+            results[index] = _bulk_result(
+                index, operation["op"], 409, row.id, "Article has been modified."
+            )
+            return None
+        touched.add(row.id)
+        return row
+
+    if creates:
+        new_ids = db.session.scalars(
+            db.insert(Article).returning(Article.id, sort_by_parameter_order=True),
+            [
+                {
+                    "title": operations[i]["title"],
+                    "content": operations[i]["content"],
+                    "user_id": g.current_user.id,
+                }
+                for i in creates
+            ],
+        ).all()
+        for index, new_id in zip(creates, new_ids):
+            results[index] = _bulk_result(index, "create", 201, new_id)
+
+    table = Article.__table__
+    now = datetime.now(timezone.utc)
+
+    update_params = []
+    for index in updates:
+        row = check(index)
+        if row is not None:
+            operation = operations[index]
+            update_params.append(
+                {
+                    "b_id": row.id,
+                    "b_title": operation.get("title"),
+                    "b_content": operation.get("content"),
+                    "b_old_version": row.version,
+                    "b_version": row.version + 1,
+                    "b_updated_at": now,
+                }
+            )
+            results[index] = _bulk_result(index, "update", 200, row.id)
+    # Each write also matches the version read above, so a row changed in
+    # between (where FOR UPDATE locks nothing, as on SQLite) fails the batch.
+    applied = True
+    if update_params:
+        applied = _execute_each(
+            table.update()
+            .where(
+                table.c.id == db.bindparam("b_id"),
+                table.c.version == db.bindparam("b_old_version"),
+            )
+            .values(
+                title=db.func.coalesce(db.bindparam("b_title"), table.c.title),
+                content=db.func.coalesce(db.bindparam("b_content"), table.c.content),
+                version=db.bindparam("b_version"),
+                updated_at=db.bindparam("b_updated_at"),
+            ),
+            update_params,
+        )
+
+    delete_params = []
+    for index in deletes:
+        row = check(index)
+        if row is not None:
+            delete_params.append({"b_id": row.id, "b_old_version": row.version})
+            results[index] = _bulk_result(index, "delete", 200, row.id)
+    if applied and delete_params:
+        applied = _execute_each(
+            table.delete().where(
+                table.c.id == db.bindparam("b_id"),
+                table.c.version == db.bindparam("b_old_version"),
+            ),
+            delete_params,
+        )
+    if not applied:
+        db.session.rollback()
+        return error_response("Articles were modified concurrently; nothing was changed.", 409)
+
+    record_changes(
+        db.session,
+        [(r["id"], r["op"]) for r in results if r["status"] in (200, 201)],
+    )
+    db.session.commit()
+    article_cache.invalidate(*touched)
+    return jsonify({"results": results}), 200
@@ -1,13 +1,24 @@
 from flask import Blueprint, jsonify, request, g
-from werkzeug.security import check_password_hash, generate_password_hash
 
-from helpers import generate_token, token_required
+from helpers import (
+    generate_token,
+    token_required,
+    passwords,
+    revocations,
+    HashingPoolSaturated,
+    roles,
+    rate_limit,
+    COST_GET,
+)
 from models import db, User
 
 bp = Blueprint("auth", __name__)
 
+SIGNUP_ROLE = "viewer"
+
 
 @bp.route("/login", methods=["POST"])
+@rate_limit(scope="ip")
 def login():
     username = request.json.get("username")
     password = request.json.get("password")
@@ -16,14 +27,21 @@ def login():
         return jsonify({"error": "Username and password are required"}), 400
 
     user = User.query.filter_by(username=username).first()
-    if user and check_password_hash(user.password, password):
-        token = generate_token(user.id, user.role.name)
+    if user and passwords.verify(user.password, password):
+        if passwords.needs_rehash(user.password):
+            try:
+                user.password = passwords.hash(password)
+                db.session.commit()
+            except HashingPoolSaturated:
+                pass  # Keep the old hash; the next login will retry.
+        token = generate_token(user.id, user.role_id, user.username)
         return jsonify({"token": token}), 200
 
     return jsonify({"error": "Invalid username or password"}), 401
 
 
 @bp.route("/signup", methods=["POST"])
+@rate_limit(scope="ip")
 def signup():
     username = request.json.get("username")
     password = request.json.get("password")
@@ -35,19 +53,37 @@ def signup():
     if existing_user:
         return jsonify({"error": "User already exists"}), 400
 
-    hashed_password = generate_password_hash(password)
-    user = User(username=username, password=hashed_password, role="VIEWER")
+    role_id = roles.id(SIGNUP_ROLE)
+    if role_id is None:
+        return jsonify({"error": f"Role '{SIGNUP_ROLE}' does not exist"}), 500
+
+    hashed_password = passwords.hash(password)
+    user = User(username=username, password=hashed_password, role_id=role_id)
 
     db.session.add(user)
     db.session.commit()
 
-    token = generate_token(user.id, user.role)
+    token = generate_token(user.id, user.role_id, user.username)
     return jsonify({"token": token}), 201
 
 
 @bp.route("/refresh", methods=["POST"])
 @token_required
+@rate_limit(COST_GET)
 def refresh():
     user = g.current_user
-    new_token = generate_token(user.id, user.role)
+    new_token = generate_token(user.id, roles.id(user.role), user.username)
+    if "jti" in g.token:
+        revocations.revoke_token(g.token)
+        db.session.commit()
     return jsonify({"token": new_token}), 200
+
+
+@bp.route("/logout", methods=["POST"])
+@token_required
+@rate_limit(COST_GET)
+def logout():
+    if "jti" in g.token:
+        revocations.revoke_token(g.token)
+        db.session.commit()
+    return jsonify({"message": "Logged out"}), 200
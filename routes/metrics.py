@@ -0,0 +1,14 @@
+from flask import Blueprint, jsonify, g
+
+from helpers import token_required, metrics
+
+bp = Blueprint("metrics", __name__)
+
+
+@bp.route("/metrics", methods=["GET"])
+@token_required
+def get_metrics():
+    if g.current_role != "admin":
+        return jsonify({"error": "Permission denied"}), 403
+
+    return jsonify(metrics.snapshot()), 200
@@ -1,38 +1,69 @@
+from collections import namedtuple
+
 from flask import Blueprint, jsonify, request, g
-from werkzeug.security import generate_password_hash
 
-from models import db, User, Role
-from helpers import token_required
+from models import db, User, Article, record_changes
+from models.article import utcnow
+from helpers import (
+    token_required,
+    read_replica,
+    InvalidPageRequest,
+    page_args,
+    paginate,
+    split_page,
+    add_page_links,
+    rows_response,
+    principals,
+    revocations,
+    roles,
+    passwords,
+    article_cache,
+    rate_limit,
+    list_cost,
+    COST_GET,
+    COST_WRITE,
+)
 
 bp = Blueprint("users", __name__)
 
+PAGE_KEYS = [("id", User.id, False)]
+USER_FIELDS = ("id", "username", "role")
+UserRow = namedtuple("UserRow", USER_FIELDS)
+
 
 @bp.route("/users", methods=["GET"])
 @token_required
+@rate_limit(list_cost)
+@read_replica
 def get_users():
     if g.current_role != "admin":
         return jsonify({"error": "Permission denied"}), 403
 
+    try:
+        limit, after = page_args(PAGE_KEYS)
+    except InvalidPageRequest as e:
+        return jsonify({"error": str(e)}), 400
+
     search_term = request.args.get("q", "")
-    if not search_term:
-        users = db.session.query(User).all()
-    else:
-        users = (
-            db.session.query(User)
-            .filter(
-                (User.username.ilike(f"%{search_term}%"))
-                | (User.role.has(name=search_term))
-            )
-            .all()
-        )
-
-    return jsonify(
-        [{"id": u.id, "username": u.username, "role": u.role.name} for u in users]
+    query = db.session.query(User.id, User.username, User.role_id)
+    if search_term:
+        condition = User.username.ilike(f"%{search_term}%")
+        role_id = roles.id(search_term)
+        if role_id is not None:
+            condition = condition | (User.role_id == role_id)
+        query = query.filter(condition)
+    users, next_cursor = split_page(
+        paginate(query, PAGE_KEYS, limit, after).all(), PAGE_KEYS, limit
     )
+    users = [UserRow(u.id, u.username, roles.name(u.role_id)) for u in users]
+
+    return add_page_links(rows_response(users, USER_FIELDS), next_cursor)
 
 
 @bp.route("/users/<int:id>", methods=["GET"])
 @token_required
+@rate_limit(COST_GET)
+@read_replica
 def get_user_by_id(id):
     if g.current_role != "admin":
         return jsonify({"error": "Permission denied"}), 403
@@ -41,11 +72,12 @@ def get_user_by_id(id):
     if user is None:
         return jsonify({"error": "User not found"}), 404
 
-    return jsonify({"id": user.id, "username": user.username, "role": user.role.name})
+    return jsonify({"id": user.id, "username": user.username, "role": roles.name(user.role_id)})
 
 
 @bp.route("/users", methods=["POST"])
 @token_required
+@rate_limit(COST_WRITE)
 def create_user():
     if g.current_role != "admin":
         return jsonify({"error": "Permission denied"}), 403
@@ -53,14 +85,12 @@ def create_user():
     data = request.get_json()
     username = data["username"]
     password = data["password"]
-    role_name = data["role"]
-
-    role = Role.query.filter_by(name=role_name).first()
-    if not role:
+    role_id = roles.id(data["role"])
+    if role_id is None:
         return jsonify({"error": "Invalid role"}), 400
 
-    hashed_password = generate_password_hash(password)
-    new_user = User(username=username, password=hashed_password, role=role)
+    hashed_password = passwords.hash(password)
+    new_user = User(username=username, password=hashed_password, role_id=role_id)
 
     db.session.add(new_user)
     db.session.commit()
@@ -70,6 +100,7 @@ def create_user():
 
 @bp.route("/users/<int:id>", methods=["PUT"])
 @token_required
+@rate_limit(COST_WRITE)
 def update_user(id):
     if g.current_role != "admin":
         return jsonify({"error": "Permission denied"}), 403
@@ -80,30 +111,66 @@ def update_user(id):
         return jsonify({"error": "User not found"}), 404
 
     data = request.get_json()
+    role_id = roles.id(data["role"]) if "role" in data else user.role_id
+    if role_id is None:
+        return jsonify({"error": "Invalid role"}), 400
 
+    renamed = data.get("username", user.username) != user.username
     user.username = data.get("username", user.username)
     if "password" in data:
-        user.password = generate_password_hash(data["password"])
+        user.password = passwords.hash(data["password"])
     if "role" in data:
-        user.role = Role.query.filter_by(name=data["role"]).first()
+        user.role_id = role_id
+    if renamed or "password" in data or "role" in data:
+        # Tokens carry the username and role, and a new password should
+        # end existing sessions.
+        revocations.revoke_user(id)
+    article_ids = []
+    if renamed:
+        # Article payloads embed the author's username, so each of their
+        # articles changes: for Last-Modified, the feed and the cache.
+        articles = Article.__table__
+        article_ids = db.session.scalars(
+            articles.update()
+            .where(articles.c.user_id == id)
+            .values(updated_at=utcnow())
+            .returning(articles.c.id)
+        ).all()
+        record_changes(db.session, [(article_id, "update") for article_id in article_ids])
 
     db.session.commit()
+    principals.invalidate(id)
+    if article_ids:
+        article_cache.invalidate(*article_ids)
 
     return jsonify({"message": "User updated successfully"}), 200
 
 
 @bp.route("/users/<int:id>", methods=["DELETE"])
 @token_required
+@rate_limit(COST_WRITE)
 def delete_user(id):
     if g.current_role != "admin":
         return jsonify({"error": "Permission denied"}), 403
 
-    user = db.session.get(User, id)
+    # Locked, so no article can be added for the user while they go.
+    user = db.session.get(User, id, with_for_update=True)
 
     if user is None:
         return jsonify({"error": "User not found"}), 404
 
+    # The database deletes their articles (ON DELETE CASCADE, found via
+    # ix_articles_user_id). The ORM never sees those deletes, so log them
+    # for the changes feed and drop the articles from the cache here.
+    article_ids = db.session.scalars(
+        db.select(Article.id).where(Article.user_id == id)
+    ).all()
     db.session.delete(user)
+    record_changes(db.session, [(article_id, "delete") for article_id in article_ids])
+    revocations.revoke_user(id)
     db.session.commit()
+    principals.invalidate(id)
+    if article_ids:
+        article_cache.invalidate(*article_ids)
 
     return jsonify({"message": "User deleted successfully"}), 200
@@ -0,0 +1,28 @@
+"""Compile docs/swagger.yml to docs/swagger.json.
+
+The app serves the JSON when it is at least as new as the YAML, which
+skips the YAML parse at startup or on the first /apidocs request. Run it
+at image build time, after changing the YAML:
+
+    python -m scripts.build_spec
+"""
+import json
+import os
+
+import yaml
+
+from helpers.docs import SPEC_COMPILED, SPEC_SOURCE
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build_spec(source=SPEC_SOURCE, target=SPEC_COMPILED):
+    with open(os.path.join(ROOT, source), encoding="utf-8") as f:
+        spec = yaml.safe_load(f)
+    with open(os.path.join(ROOT, target), "w", encoding="utf-8") as f:
+        json.dump(spec, f, separators=(",", ":"))
+    return target
+
+
+if __name__ == "__main__":
+    print(f"Wrote {build_spec()}")
@@ -0,0 +1,107 @@
+"""Check the live database schema for indexes the models rely on.
+
+For every table in the models' metadata it reports:
+
+- indexes and unique constraints declared on the models (``index=True``,
+  ``unique=True``, ``Index(...)``) that the database does not have;
+- foreign keys whose columns do not lead any index, so joins through them
+  and deletes of the referenced rows scan the whole table;
+- tables that do not exist at all.
+
+Exits with status 1 when anything is missing, so it can run after
+``alembic upgrade head`` in CI.
+
+    python -m scripts.check_indexes
+    python -m scripts.check_indexes --sql   # also print CREATE INDEX statements
+"""
+import argparse
+import sys
+from collections import namedtuple
+
+from sqlalchemy import UniqueConstraint, inspect
+
+from app import create_app, db
+
+Missing = namedtuple("Missing", ["table", "columns", "unique", "reason"])
+
+
+def live_indexes(inspector, table):
+    """(column names, unique) for every index-backed constraint on ``table``."""
+    indexes = [(i["column_names"], bool(i["unique"])) for i in inspector.get_indexes(table)]
+    indexes += [(u["column_names"], True) for u in inspector.get_unique_constraints(table)]
+    primary_key = inspector.get_pk_constraint(table)["constrained_columns"]
+    if primary_key:
+        indexes.append((primary_key, True))
+    return indexes
+
+
+def expected_indexes(table):
+    for index in table.indexes:
+        yield [c.name for c in index.columns], index.unique, f"index {index.name}"
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint):
+            yield [c.name for c in constraint.columns], True, "unique constraint"
+    for fk in table.foreign_key_constraints:
+        yield list(fk.column_keys), False, f"foreign key to {fk.referred_table.name}"
+
+
+def covered(columns, unique, live):
+    """An index serves lookups on ``columns`` if they are its leading columns."""
+    for live_columns, live_unique in live:
+        if unique and not (live_unique and live_columns == columns):
+            continue
+        if list(live_columns[: len(columns)]) == columns:
+            return True
+    return False
+
+
+def check(metadata, engine):
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    missing = []
+    for table in metadata.sorted_tables:
+        if table.name not in tables:
+            missing.append(Missing(table.name, [], False, "table does not exist"))
+            continue
+        live = live_indexes(inspector, table.name)
+        found = {}
+        for columns, unique, reason in expected_indexes(table):
+            if covered(columns, unique, live):
+                continue
+            # One index fixes every problem on the same columns.
+            previous = found.get(tuple(columns))
+            if previous is not None:
+                unique = unique or previous.unique
+                reason = f"{previous.reason}; {reason}"
+            found[tuple(columns)] = Missing(table.name, columns, unique, reason)
+        missing.extend(found.values())
+    return missing
+
+
+def create_statement(item):
+    name = f"ix_{item.table}_{'_'.join(item.columns)}"
+    unique = "UNIQUE " if item.unique else ""
+    return f"CREATE {unique}INDEX {name} ON {item.table} ({', '.join(item.columns)});"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the database for missing indexes.")
+    parser.add_argument("--sql", action="store_true", help="Print CREATE INDEX statements.")
+    args = parser.parse_args(argv)
+
+    app = create_app({"API_DOCS": "off"})
+    with app.app_context():
+        missing = check(db.metadata, db.engine)
+
+    for item in missing:
+        columns = f" ({', '.join(item.columns)})" if item.columns else ""
+        print(f"MISSING {item.table}{columns}: {item.reason}")
+        if args.sql and item.columns:
+            print(f"  {create_statement(item)}")
+    if not missing:
+        print("All model indexes and foreign key indexes are present.")
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,15 @@
 import argparse
-from werkzeug.security import generate_password_hash
 
 from app import create_app, db
-from models import User, Role
+from models import User
+from helpers import passwords, roles
 
 
 def create_user(username, password, role_name):
-    app = create_app()
+    app = create_app({"API_DOCS": "off"})
     with app.app_context():
-        role = Role.query.filter_by(name=role_name).first()
-        if not role:
+        role_id = roles.id(role_name)
+        if role_id is None:
             print(f"Error: Role '{role_name}' does not exist.")
             return
 
@@ -20,8 +20,8 @@ def create_user(username, password, role_name):
 
         new_user = User(
             username=username,
-            password=generate_password_hash(password),
-            role_id=role.id,
+            password=passwords.hash(password),
+            role_id=role_id,
         )
         db.session.add(new_user)
         db.session.commit()
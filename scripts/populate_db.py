@@ -1,37 +1,47 @@
-from werkzeug.security import generate_password_hash
+import argparse
+import csv
+import io
+import random
+import string
+import time
+
+from sqlalchemy import insert, select
 
 from app import create_app, db
+from helpers import passwords, roles
 from models import User, Role, Article
 
 
 def create_roles():
-    roles = ["admin", "editor", "viewer"]
-    for role_name in roles:
-        role = Role.query.filter_by(name=role_name).first()
-        if not role:
-            role = Role(name=role_name)
-            db.session.add(role)
+    for role_name in ["admin", "editor", "viewer"]:
+        if roles.id(role_name) is None:
+            db.session.add(Role(name=role_name))
     db.session.commit()
     print("Roles created successfully.")
 
 
 def create_users():
-    roles = {role.name: role for role in Role.query.all()}
     users = [
-        {"username": "admin_user", "password": "adminpass", "role": roles["admin"]},
-        {"username": "editor_user", "password": "editorpass", "role": roles["editor"]},
-        {"username": "viewer1", "password": "viewerpass1", "role": roles["viewer"]},
-        {"username": "viewer2", "password": "viewerpass2", "role": roles["viewer"]},
-        {"username": "viewer3", "password": "viewerpass3", "role": roles["viewer"]},
+        {"username": "admin_user", "password": "adminpass", "role": "admin"},
+        {"username": "editor_user", "password": "editorpass", "role": "editor"},
+        {"username": "viewer1", "password": "viewerpass1", "role": "viewer"},
+        {"username": "viewer2", "password": "viewerpass2", "role": "viewer"},
+        {"username": "viewer3", "password": "viewerpass3", "role": "viewer"},
     ]
 
+    existing = set(
+        db.session.scalars(
+            select(User.username).where(
+                User.username.in_([u["username"] for u in users])
+            )
+        )
+    )
     for user_data in users:
-        user = User.query.filter_by(username=user_data["username"]).first()
-        if not user:
+        if user_data["username"] not in existing:
             user = User(
                 username=user_data["username"],
-                password=generate_password_hash(user_data["password"]),
-                role_id=user_data["role"].id,
+                password=passwords.hash(user_data["password"]),
+                role_id=roles.id(user_data["role"]),
             )
             db.session.add(user)
     db.session.commit()
@@ -94,11 +104,209 @@ def create_articles():
     print("Articles created successfully.")
 
 
+class TextGenerator:
+    """Deterministic filler text.
+
+    Builds one corpus of pseudo-words up front and cuts articles out of it,
+    which is far cheaper than drawing every word separately.
+    """
+
+    def __init__(self, rng, vocabulary=5000, corpus_words=500_000):
+        words = [
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10)))
+            for _ in range(vocabulary)
+        ]
+        self.words = words
+        self.corpus = " ".join(rng.choices(words, k=corpus_words))
+        self.rng = rng
+
+    def title(self):
+        return " ".join(self.rng.choices(self.words, k=self.rng.randint(2, 8))).title()[:100]
+
+    def content(self, chars):
+        chars = min(chars, len(self.corpus) // 2)
+        start = self.corpus.find(" ", self.rng.randrange(len(self.corpus) - chars)) + 1
+        return self.corpus[start:start + chars].strip() or self.words[0]
+
+
+class Progress:
+    def __init__(self, label, total):
+        self.label = label
+        self.total = total
+        self.done = 0
+        self.started = time.perf_counter()
+
+    def update(self, count):
+        self.done += count
+        elapsed = time.perf_counter() - self.started
+        rate = self.done / elapsed if elapsed else 0
+        print(
+            f"\r{self.label}: {self.done}/{self.total} ({rate:,.0f} rows/s)",
+            end="",
+            flush=True,
+        )
+        if self.done >= self.total:
+            print()
+
+
+def generate_users(count, rng, role_weights, password, prefix, batch_size):
+    role_names = list(role_weights)
+    role_ids = {name: roles.id(name) for name in role_names}
+    unknown = [name for name, role_id in role_ids.items() if role_id is None]
+    if unknown:
+        raise SystemExit(f"Unknown roles: {', '.join(unknown)}")
+    weights = [role_weights[name] for name in role_names]
+    password_hash = passwords.hash(password)
+    start = db.session.query(User).filter(User.username.like(f"{prefix}%")).count()
+
+    progress = Progress("users", count)
+    for offset in range(0, count, batch_size):
+        size = min(batch_size, count - offset)
+        batch = [
+            {
+                "username": f"{prefix}{start + offset + i}",
+                "password": password_hash,
+                "role_id": role_ids[role],
+            }
+            for i, role in enumerate(rng.choices(role_names, weights, k=size))
+        ]
+        db.session.execute(insert(User), batch)
+        db.session.commit()
+        progress.update(size)
+
+
+def author_weights(user_ids, skew):
+    # Zipf-like: a few prolific authors, a long tail of occasional ones.
+    cumulative, total = [], 0.0
+    for rank in range(1, len(user_ids) + 1):
+        total += 1.0 / rank**skew
+        cumulative.append(total)
+    return cumulative
+
+
+def article_batches(count, rng, text, user_ids, args):
+    cumulative = author_weights(user_ids, args.author_skew)
+    for offset in range(0, count, args.batch_size):
+        size = min(args.batch_size, count - offset)
+        authors = rng.choices(user_ids, cum_weights=cumulative, k=size)
+        batch = []
+        for user_id in authors:
+            chars = int(rng.lognormvariate(args.content_mu, args.content_sigma))
+            chars = max(1, min(chars, args.content_max))
+            batch.append(
+                {"title": text.title(), "content": text.content(chars), "user_id": user_id}
+            )
+        yield batch
+
+
+def copy_articles(batch):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in batch:
+        writer.writerow((row["title"], row["content"], row["user_id"]))
+    buffer.seek(0)
+    connection = db.session.connection().connection
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            "COPY articles (title, content, user_id) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+
+
+def generate_articles(count, rng, args):
+    user_ids = list(db.session.scalars(select(User.id).order_by(User.id)))
+    if not user_ids:
+        raise SystemExit("No users to author articles; create users first.")
+    rng.shuffle(user_ids)
+    text = TextGenerator(rng)
+
+    progress = Progress("articles", count)
+    for batch in article_batches(count, rng, text, user_ids, args):
+        if args.copy:
+            copy_articles(batch)
+        else:
+            db.session.execute(insert(Article), batch)
+        db.session.commit()
+        progress.update(len(batch))
+
+
+def parse_role_weights(value):
+    weights = {}
+    for part in value.split(","):
+        name, _, weight = part.partition(":")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Populate the database with demo data, or with synthetic data at scale."
+    )
+    parser.add_argument("--users", type=int, default=0, help="Synthetic users to create.")
+    parser.add_argument(
+        "--articles", type=int, default=0, help="Synthetic articles to create."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per INSERT.")
+    parser.add_argument(
+        "--copy",
+        action="store_true",
+        help="Load articles with Postgres COPY instead of batched INSERTs.",
+    )
+    parser.add_argument(
+        "--prefix", default="synthetic_", help="Username prefix for synthetic users."
+    )
+    parser.add_argument(
+        "--password", default="syntheticpass", help="Password of every synthetic user."
+    )
+    parser.add_argument(
+        "--roles",
+        type=parse_role_weights,
+        default="admin:1,editor:9,viewer:90",
+        help="Role mix for synthetic users as name:weight pairs.",
+    )
+    parser.add_argument(
+        "--content-mu",
+        type=float,
+        default=7.5,
+        help="Mean of log(content length in chars); the default median is ~1.8k chars.",
+    )
+    parser.add_argument(
+        "--content-sigma",
+        type=float,
+        default=0.8,
+        help="Spread of the log-normal content length distribution.",
+    )
+    parser.add_argument(
+        "--content-max", type=int, default=100_000, help="Maximum content length in chars."
+    )
+    parser.add_argument(
+        "--author-skew",
+        type=float,
+        default=1.0,
+        help="Zipf exponent of articles per author; 0 spreads articles evenly.",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    print("Starting database population...")
-    app = create_app()
+    args = parse_args()
+    app = create_app({"API_DOCS": "off"})
     with app.app_context():
-        create_roles()
-        create_users()
-        create_articles()
-    print("Database populated successfully!")
+        if not args.users and not args.articles:
+            print("Starting database population...")
+            create_roles()
+            create_users()
+            create_articles()
+            print("Database populated successfully!")
+        else:
+            if args.copy and db.engine.dialect.name != "postgresql":
+                raise SystemExit("--copy is only supported on PostgreSQL.")
+            rng = random.Random(args.seed)
+            create_roles()
+            if args.users:
+                generate_users(
+                    args.users, rng, args.roles, args.password, args.prefix, args.batch_size
+                )
+            if args.articles:
+                generate_articles(args.articles, rng, args)
@@ -0,0 +1,66 @@
+"""Delete article change log entries older than the retention period.
+
+Clients of /articles/changes that fall further behind than this get 410
+and must reload. Run it periodically, e.g. daily from cron:
+
+    python -m scripts.prune_changes
+    python -m scripts.prune_changes --days 30
+"""
+import argparse
+import sys
+from datetime import timedelta
+
+from sqlalchemy import delete, func, select
+
+from app import create_app, db
+from models import ArticleChange
+from models.article import utcnow
+
+
+def prune_changes(session, older_than, batch_size=10000):
+    """Delete entries logged before ``older_than``, committing every batch. Returns the count.
+
+    The newest entry is always kept: SQLite would otherwise number the next
+    one from 1 again and clients further along would never see it.
+    """
+    table = ArticleChange.__table__
+    newest = select(func.max(table.c.seq)).scalar_subquery()
+    pruned = 0
+    while True:
+        batch = (
+            select(table.c.seq)
+            .where(table.c.changed_at < older_than, table.c.seq < newest)
+            .order_by(table.c.seq)
+            .limit(batch_size)
+        )
+        deleted = session.execute(
+            delete(table).where(table.c.seq.in_(batch.scalar_subquery()))
+        ).rowcount
+        session.commit()
+        pruned += deleted
+        if deleted < batch_size:
+            return pruned
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prune the article change log.")
+    parser.add_argument(
+        "--days", type=float, help="Keep this many days (default: CHANGES_RETENTION)."
+    )
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    app = create_app({"API_DOCS": "off"})
+    with app.app_context():
+        retention = (
+            timedelta(days=args.days)
+            if args.days is not None
+            else timedelta(seconds=app.config["CHANGES_RETENTION"])
+        )
+        pruned = prune_changes(db.session, utcnow() - retention, args.batch_size)
+    print(f"Pruned {pruned} change log entries older than {retention}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -46,4 +46,27 @@ def add_article(test_client, add_user):
             db.session.add(article)
             db.session.commit()
             db.session.refresh(article)
+        article.content  # deferred; load it before the session goes away
         return article
+
+
+class FakeRedis:
+    """In-memory stand-in for the subset of redis.Redis the app uses."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
@@ -1,5 +1,13 @@
-from models import db, Article
-from helpers import get_token
+import gzip
+import json
+from datetime import timedelta
+
+from sqlalchemy.orm import scoped_session
+
+from models import db, Article, ArticleChange
+from models.article import utcnow
+from helpers import admission, count_queries, get_token
+from scripts.prune_changes import prune_changes
 
 
 def test_get_articles_from_admin(test_client, add_user, add_article):
@@ -122,3 +130,454 @@ def test_delete_own_article(test_client, add_user, add_article):
         with db.session.begin():
             deleted_article = db.session.get(Article, article.id)
             assert deleted_article is None
+
+
+def test_get_articles_paginated(test_client, add_user):
+    with test_client.application.app_context():
+        admin_user = add_user
+        token = get_token(test_client, admin_user)
+        articles = [
+            Article(title=f"Page Article {i}", content="Paged", user_id=admin_user.id)
+            for i in range(3)
+        ]
+        db.session.add_all(articles)
+        db.session.commit()
+
+        seen = []
+        url = "/articles?q=Paged&limit=2"
+        while url:
+            response = test_client.get(
+                url, headers={"Authorization": f"Bearer {token}"}
+            )
+            assert response.status_code == 200
+            assert len(response.json) <= 2
+            seen.extend(a["id"] for a in response.json)
+            cursor = response.headers.get("X-Next-Cursor")
+            url = f"/articles?q=Paged&limit=2&after={cursor}" if cursor else None
+
+        assert seen == sorted(a.id for a in articles)
+
+        for article in articles:
+            db.session.delete(article)
+        db.session.commit()
+
+
+def test_get_articles_invalid_cursor(test_client, add_user):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+
+        for query in ("after=not-a-cursor", "limit=0", "limit=abc"):
+            response = test_client.get(
+                f"/articles?{query}", headers={"Authorization": f"Bearer {token}"}
+            )
+            assert response.status_code == 400
+            assert "error" in response.json
+
+
+def test_article_to_dict_matches_row_projection(test_client, add_user, add_article):
+    with test_client.application.app_context():
+        article = db.session.get(Article, add_article.id)
+        row = Article.rows().filter(Article.id == article.id).one()
+
+        assert Article.serialize(row) == article.to_dict()
+        assert row.author == add_user.username
+
+
+def test_search_articles_ranks_title_matches_first(test_client, add_user):
+    with test_client.application.app_context():
+        admin_user = add_user
+        token = get_token(test_client, admin_user)
+        in_content = Article(
+            title="Unrelated", content="About zebrafish", user_id=admin_user.id
+        )
+        in_title = Article(
+            title="Zebrafish care", content="Tanks", user_id=admin_user.id
+        )
+        db.session.add_all([in_content, in_title])
+        db.session.commit()
+
+        response = test_client.get(
+            "/articles?q=zebrafish", headers={"Authorization": f"Bearer {token}"}
+        )
+
+        assert response.status_code == 200
+        assert [a["id"] for a in response.json] == [in_title.id, in_content.id]
+
+        response = test_client.get(
+            "/articles?q=zebrafish&limit=1", headers={"Authorization": f"Bearer {token}"}
+        )
+        cursor = response.headers["X-Next-Cursor"]
+        response = test_client.get(
+            f"/articles?q=zebrafish&limit=1&after={cursor}",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert [a["id"] for a in response.json] == [in_content.id]
+
+        db.session.delete(in_content)
+        db.session.delete(in_title)
+        db.session.commit()
+
+
+def test_get_article_conditional(test_client, add_user, add_article):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        response = test_client.get(f"/articles/{add_article.id}", headers=headers)
+        etag = response.headers["ETag"]
+        last_modified = response.headers["Last-Modified"]
+
+        response = test_client.get(
+            f"/articles/{add_article.id}", headers={**headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.data == b""
+
+        response = test_client.get(
+            f"/articles/{add_article.id}",
+            headers={**headers, "If-Modified-Since": last_modified},
+        )
+        assert response.status_code == 304
+
+        response = test_client.get("/articles", headers=headers)
+        list_etag = response.headers["ETag"]
+        response = test_client.get(
+            "/articles", headers={**headers, "If-None-Match": list_etag}
+        )
+        assert response.status_code == 304
+
+
+def test_update_article_if_match(test_client, add_user, add_article):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        headers = {"Authorization": f"Bearer {token}"}
+        etag = test_client.get(
+            f"/articles/{add_article.id}", headers=headers
+        ).headers["ETag"]
+
+        response = test_client.put(
+            f"/articles/{add_article.id}",
+            json={"content": "Changed Content"},
+            headers={**headers, "If-Match": etag},
+        )
+        assert response.status_code == 200
+
+        # The update bumped the version, so the old ETag is stale now.
+        response = test_client.put(
+            f"/articles/{add_article.id}",
+            json={"content": "Test Content"},
+            headers={**headers, "If-Match": etag},
+        )
+        assert response.status_code == 412
+
+        response = test_client.delete(
+            f"/articles/{add_article.id}", headers={**headers, "If-Match": etag}
+        )
+        assert response.status_code == 412
+
+
+def test_export_articles_ndjson(test_client, add_user, add_article):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        response = test_client.get("/articles/export", headers=headers)
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+        rows = [json.loads(line) for line in response.data.decode().splitlines()]
+        ids = [row["id"] for row in rows]
+        assert ids == sorted(ids)
+        assert add_article.id in ids
+
+        response = test_client.get(
+            f"/articles/export?after={add_article.id}", headers=headers
+        )
+        resumed = [json.loads(line) for line in response.data.decode().splitlines()]
+        assert all(row["id"] > add_article.id for row in resumed)
+
+
+def test_export_articles_csv_gzip(test_client, add_user, add_article):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+
+        response = test_client.get(
+            "/articles/export?format=csv&gzip=1",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        lines = gzip.decompress(response.data).decode().splitlines()
+        assert lines[0] == "id,title,content,author"
+        assert len(lines) > 1
+
+        response = test_client.get(
+            "/articles/export?format=xml", headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 400
+
+
+def test_bulk_articles(test_client, add_user, add_article):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        headers = {"Authorization": f"Bearer {token}"}
+        doomed = Article(title="Bulk doomed", content="Bulk", user_id=add_user.id)
+        db.session.add(doomed)
+        db.session.commit()
+        doomed_id = doomed.id
+
+        response = test_client.post(
+            "/articles/bulk",
+            json=[
+                {"op": "create", "title": "Bulk 1", "content": "Bulk"},
+                {"op": "create", "title": "Bulk 2"},
+                {"op": "update", "id": add_article.id, "content": "Bulk Content"},
+                {"op": "delete", "id": doomed_id},
+                {"op": "delete", "id": 999999},
+                {"op": "update", "id": add_article.id, "version": 0},
+            ],
+            headers=headers,
+        )
+
+        assert response.status_code == 200
+        results = response.json["results"]
+        assert [r["status"] for r in results] == [201, 400, 200, 200, 404, 400]
+
+        db.session.expire_all()
+        created = db.session.get(Article, results[0]["id"])
+        assert created.title == "Bulk 1"
+        assert created.version == 1
+        updated = db.session.get(Article, add_article.id)
+        assert updated.content == "Bulk Content"
+        assert updated.title == "Test Article"
+        assert updated.version == add_article.version + 1
+        assert db.session.query(Article.id).filter_by(id=doomed_id).first() is None
+
+        response = test_client.get(f"/articles/{add_article.id}", headers=headers)
+        assert response.json["content"] == "Bulk Content"
+
+        updated.content = "Test Content"
+        db.session.delete(created)
+        db.session.commit()
+
+
+def test_bulk_articles_validates_types(test_client, add_user, add_article):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        response = test_client.post(
+            "/articles/bulk",
+            json=[
+                {"op": "delete", "id": True},
+                {"op": "create", "title": ["Bulk"], "content": "Bulk"},
+                {"op": "update", "id": add_article.id, "content": {"text": "Bulk"}},
+            ],
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        results = response.json["results"]
+        assert [r["status"] for r in results] == [400, 400, 400]
+        assert [r["error"] for r in results] == [
+            "id is required.",
+            "Title and content must be strings.",
+            "Title and content must be strings.",
+        ]
+
+
+def test_bulk_articles_conflict(test_client, add_user, add_article, monkeypatch):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        version = db.session.get(Article, add_article.id).version
+    table = Article.__table__
+    execute = scoped_session.execute
+
+    def execute_after_concurrent_write(self, statement, params=None, **kwargs):
+        # Another writer bumps the version between the read and the update.
+        if getattr(statement, "is_update", False) and statement.table is table:
+            bump = table.update().where(table.c.id == add_article.id)
+            execute(self, bump.values(version=table.c.version + 1))
+        return execute(self, statement, params, **kwargs)
+
+    monkeypatch.setattr(scoped_session, "execute", execute_after_concurrent_write)
+    response = test_client.post(
+        "/articles/bulk",
+        json=[
+            {"op": "create", "title": "Bulk conflict", "content": "Bulk"},
+            {"op": "update", "id": add_article.id, "content": "Lost update"},
+        ],
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    monkeypatch.undo()
+    assert response.status_code == 409
+
+    with test_client.application.app_context():
+        article = db.session.get(Article, add_article.id)
+        assert (article.content, article.version) == ("Test Content", version)
+        assert Article.query.filter_by(title="Bulk conflict").count() == 0
+
+
+def test_article_changes_feed(test_client, add_user):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        headers = {"Authorization": f"Bearer {token}"}
+        since = db.session.query(db.func.max(ArticleChange.seq)).scalar() or 0
+
+        response = test_client.post(
+            "/articles",
+            json={"title": "Changes", "content": "Changes"},
+            headers=headers,
+        )
+        article_id = response.json["id"]
+        test_client.put(
+            f"/articles/{article_id}", json={"content": "Changed"}, headers=headers
+        )
+        test_client.delete(f"/articles/{article_id}", headers=headers)
+
+        response = test_client.get(f"/articles/changes?since={since}", headers=headers)
+        assert response.status_code == 200
+        changes = [c for c in response.json["changes"] if c["id"] == article_id]
+        assert [c["op"] for c in changes] == ["create", "update", "delete"]
+        assert changes[0]["seq"] < changes[1]["seq"] < changes[2]["seq"]
+        # The article is gone, so every entry for it is now a tombstone.
+        assert all(c["article"] is None for c in changes)
+        assert response.json["next_since"] == changes[-1]["seq"]
+
+        response = test_client.get(
+            f"/articles/changes?since={changes[1]['seq']}", headers=headers
+        )
+        assert [c["op"] for c in response.json["changes"]] == ["delete"]
+
+        response = test_client.get("/articles/changes?since=abc", headers=headers)
+        assert response.status_code == 400
+
+
+def _last_seq():
+    return db.session.query(db.func.max(ArticleChange.seq)).scalar() or 0
+
+
+def test_changes_logged_only_on_commit(test_client, add_user):
+    with test_client.application.app_context():
+        since = _last_seq()
+        db.session.add(Article(title="Rolled back", content="x", user_id=add_user.id))
+        db.session.flush()
+        db.session.rollback()
+        article = Article(title="Committed", content="x", user_id=add_user.id)
+        db.session.add(article)
+        db.session.commit()
+
+        logged = db.session.query(ArticleChange.article_id).filter(ArticleChange.seq > since).all()
+        assert [row.article_id for row in logged] == [article.id]
+        db.session.delete(article)
+        db.session.commit()
+
+
+def test_changes_long_poll_waits_for_a_change(test_client, add_user, monkeypatch):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        since = _last_seq()
+    user_id = add_user.id
+    sleeps = []
+
+    def sleep(seconds):
+        # Another writer commits while the poll waits.
+        sleeps.append(seconds)
+        if len(sleeps) == 1:
+            db.session.add(Article(title="Long poll", content="x", user_id=user_id))
+            db.session.commit()
+
+    monkeypatch.setattr("routes.articles.time.sleep", sleep)
+    monkeypatch.setitem(test_client.application.config, "CHANGES_POLL_INTERVAL", 0.01)
+    headers = {"Authorization": f"Bearer {token}"}
+    response = test_client.get(f"/articles/changes?since={since}&wait=5", headers=headers)
+    assert response.status_code == 200
+    assert len(sleeps) == 1
+    assert [c["article"]["title"] for c in response.json["changes"]] == ["Long poll"]
+    assert admission.waiting == 0
+
+    # No wait slot free: answered at once instead of tying up the thread.
+    monkeypatch.setattr(admission, "_wait_slots", None)
+    since = response.json["next_since"]
+    response = test_client.get(f"/articles/changes?since={since}&wait=5", headers=headers)
+    assert response.json["changes"] == []
+    assert len(sleeps) == 1
+
+
+def test_changes_stream(test_client, add_user, monkeypatch):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        since = _last_seq()
+        db.session.add(Article(title="Streamed", content="x", user_id=add_user.id))
+        db.session.commit()
+    monkeypatch.setitem(test_client.application.config, "CHANGES_POLL_INTERVAL", 0.01)
+    monkeypatch.setitem(test_client.application.config, "CHANGES_STREAM_TIMEOUT", 0.05)
+    headers = {"Authorization": f"Bearer {token}", "Accept": "text/event-stream"}
+
+    response = test_client.get(f"/articles/changes?since={since}", headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    assert admission.waiting == 1
+    body = response.get_data(as_text=True)
+    response.close()
+    assert admission.waiting == 0
+    events = [e for e in body.split("\n\n") if e.startswith("id: ")]
+    assert len(events) == 1
+    event_id, event, data = events[0].split("\n")
+    assert event == "event: change"
+    change = json.loads(data[len("data: "):])
+    assert event_id == f"id: {change['seq']}"
+    assert (change["op"], change["article"]["title"]) == ("create", "Streamed")
+
+    monkeypatch.setattr(admission, "_wait_slots", None)
+    response = test_client.get(f"/articles/changes?since={since}", headers=headers)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_changes_after_pruning(test_client, add_user):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        headers = {"Authorization": f"Bearer {token}"}
+        since = _last_seq()
+        articles = [Article(title=f"Pruned {i}", content="x", user_id=add_user.id) for i in range(2)]
+        for article in articles:
+            db.session.add(article)
+            db.session.commit()
+        seen = _last_seq() - 1
+        assert prune_changes(db.session, utcnow() + timedelta(seconds=1), batch_size=2) >= 1
+        # The newest entry stays, so sequence numbers never start over.
+        assert db.session.query(ArticleChange.seq).all() == [(seen + 1,)]
+
+        # The client missed entries that are gone: it has to reload.
+        response = test_client.get(f"/articles/changes?since={since}", headers=headers)
+        assert response.status_code == 410
+        response = test_client.get(f"/articles/changes?since={seen}", headers=headers)
+        assert [c["id"] for c in response.json["changes"]] == [articles[1].id]
+
+        for article in articles:
+            db.session.delete(article)
+        db.session.commit()
+
+
+def test_get_articles_sparse_fields(test_client, add_user, add_article):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        with count_queries() as stats:
+            response = test_client.get("/articles?fields=title,author", headers=headers)
+        assert response.status_code == 200
+        assert set(response.json[0]) == {"id", "title", "author"}
+        assert not any("articles.content" in s for s in stats.statements)
+
+        test_client.application.config["ARTICLE_PREVIEW_LENGTH"] = 4
+        try:
+            response = test_client.get(
+                f"/articles/{add_article.id}?fields=content_preview", headers=headers
+            )
+        finally:
+            test_client.application.config["ARTICLE_PREVIEW_LENGTH"] = 200
+        assert response.json == {"id": add_article.id, "content_preview": "Test"}
+
+        full = test_client.get(f"/articles/{add_article.id}", headers=headers)
+        assert full.headers["ETag"] != response.headers["ETag"]
+
+        response = test_client.get("/articles?fields=body", headers=headers)
+        assert response.status_code == 400
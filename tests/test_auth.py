@@ -1,4 +1,11 @@
+import threading
+
 import pytest
+from werkzeug.security import generate_password_hash
+
+from models import db, User, Role
+from helpers import get_token, passwords, revocations, roles
+from helpers.revocation import BloomFilter
 
 def test_login_success(test_client, add_user):
     with test_client.application.app_context():
@@ -36,3 +43,125 @@ def test_login_missing_fields(test_client, json_payload, expected_message):
     assert response.status_code == 400
     assert "error" in response.json
     assert response.json["error"] == expected_message
+
+
+def test_login_rehashes_outdated_password(test_client, add_user):
+    with test_client.application.app_context():
+        user = User(
+            username="legacy_hash_user",
+            password=generate_password_hash("legacypass", "pbkdf2:sha256:1000"),
+            role_id=add_user.role_id,
+        )
+        db.session.add(user)
+        db.session.commit()
+
+        response = test_client.post(
+            "/login", json={"username": user.username, "password": "legacypass"}
+        )
+        assert response.status_code == 200
+
+        db.session.refresh(user)
+        assert not passwords.needs_rehash(user.password)
+
+        db.session.delete(user)
+        db.session.commit()
+
+
+def test_login_rejected_when_hashing_pool_saturated(test_client, add_user, monkeypatch):
+    monkeypatch.setattr(passwords, "_slots", threading.BoundedSemaphore(1))
+    passwords._slots.acquire()
+
+    response = test_client.post(
+        "/login", json={"username": add_user.username, "password": "adminpass"}
+    )
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+
+
+def test_logout_revokes_token_in_every_worker(test_client, add_user):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        other = get_token(test_client, add_user)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        assert test_client.post("/logout", headers=headers).status_code == 200
+        response = test_client.get("/articles", headers=headers)
+        assert response.status_code == 403
+        assert response.json["error"] == "Token has been revoked"
+
+        # A fresh worker learns about it from the shared table.
+        revocations.reset()
+        assert test_client.get("/articles", headers=headers).status_code == 403
+        response = test_client.get("/articles", headers={"Authorization": f"Bearer {other}"})
+        assert response.status_code == 200
+
+
+def test_refresh_revokes_old_token(test_client, add_user):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        response = test_client.post("/refresh", headers={"Authorization": f"Bearer {token}"})
+        new_token = response.json["token"]
+
+        assert test_client.get("/articles", headers={"Authorization": f"Bearer {token}"}).status_code == 403
+        assert test_client.get("/articles", headers={"Authorization": f"Bearer {new_token}"}).status_code == 200
+
+
+def test_revocation_applies_only_once_committed(test_client, add_user):
+    with test_client.application.app_context():
+        revocations.sync(force=True)
+        revocations.revoke_user(add_user.id)
+        payload = {"user_id": add_user.id, "iat": 0}
+        assert not revocations.is_revoked(payload)
+        db.session.rollback()
+        revocations.sync(force=True)
+        assert not revocations.is_revoked(payload)
+
+        revocations.revoke_user(add_user.id)
+        db.session.commit()
+        assert revocations.is_revoked(payload)
+
+
+def test_full_sync_swaps_state_at_once(test_client, add_user, monkeypatch):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        assert test_client.post("/logout", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+        state = revocations._state
+        seen = []
+        # A reader during the reload still sees the old, complete state.
+        build = revocations._build
+        monkeypatch.setattr(
+            revocations, "_build", lambda entries: seen.append(revocations._state) or build(entries)
+        )
+        revocations.sync(force=True)
+        assert seen == [state]
+        assert revocations._state is not state
+        assert len(revocations._state[0]) == len(state[0])
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(1000)
+    keys = [f"jti-{i}" for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 50
+
+
+def test_signup_creates_viewer(test_client):
+    with test_client.application.app_context():
+        if roles.id("viewer") is None:
+            db.session.add(Role(name="viewer"))
+            db.session.commit()
+
+        response = test_client.post(
+            "/signup", json={"username": "new_viewer", "password": "viewerpass"}
+        )
+        assert response.status_code == 201
+        user = User.query.filter_by(username="new_viewer").first()
+        assert user.role.name == "viewer"
+
+        headers = {"Authorization": f"Bearer {response.json['token']}"}
+        response = test_client.get("/users", headers=headers)
+        assert response.status_code == 403
@@ -0,0 +1,132 @@
+import importlib
+import time
+
+from models import db, Article
+from helpers import get_token, article_cache, metrics, assert_max_queries
+from helpers.cache import RedisCache
+from helpers.principals import PrincipalCache
+
+
+def test_article_cache_hit_and_invalidation(test_client, add_user, add_article):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        headers = {"Authorization": f"Bearer {token}"}
+        url = f"/articles/{add_article.id}"
+
+        first = test_client.get(url, headers=headers)
+        hits = metrics.counter("cache.article.hits")
+        with assert_max_queries(0):
+            second = test_client.get(url, headers=headers)
+        assert second.json == first.json
+        assert second.headers["ETag"] == first.headers["ETag"]
+        assert metrics.counter("cache.article.hits") == hits + 1
+
+        response = test_client.put(
+            url, json={"content": "Cached Content"}, headers=headers
+        )
+        assert response.status_code == 200
+        response = test_client.get(url, headers=headers)
+        assert response.json["content"] == "Cached Content"
+
+        response = test_client.put(url, json={"content": "Test Content"}, headers=headers)
+        assert response.status_code == 200
+
+
+def test_article_list_cache_invalidated_on_create(test_client, add_user):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        before = test_client.get("/articles?q=Cache+probe", headers=headers).json
+        response = test_client.post(
+            "/articles",
+            json={"title": "Cache probe", "content": "Cache probe"},
+            headers=headers,
+        )
+        after = test_client.get("/articles?q=Cache+probe", headers=headers).json
+
+        assert len(after) == len(before) + 1
+        db.session.delete(db.session.get(Article, response.json["id"]))
+        db.session.commit()
+
+
+def test_article_cache_redis_backend(test_client, add_user, add_article, fake_redis):
+    backend = article_cache.backend
+    article_cache.backend = RedisCache(fake_redis, ttl=60, prefix="article:")
+    try:
+        with test_client.application.app_context():
+            token = get_token(test_client, add_user)
+            headers = {"Authorization": f"Bearer {token}"}
+            url = f"/articles/{add_article.id}"
+
+            first = test_client.get(url, headers=headers)
+            assert f"article:item:{add_article.id}" in fake_redis.data
+
+            response = test_client.get(
+                url, headers={**headers, "If-None-Match": first.headers["ETag"]}
+            )
+            assert response.status_code == 304
+    finally:
+        article_cache.backend = backend
+
+
+def test_article_cache_refuses_stale_writes(test_client):
+    with test_client.application.test_request_context():
+        response = test_client.application.response_class("{}", mimetype="application/json")
+        response.headers["ETag"] = '"v1"'
+
+        generation = article_cache.generation("item:1")
+        article_cache.invalidate(1)  # a write lands while the query runs
+        article_cache.set("item:1", response, generation)
+        assert article_cache.get("item:1", article_cache.generation("item:1")) is None
+
+        generation = article_cache.generation("item:1")
+        article_cache.set("item:1", response, generation)
+        # Writes to other articles leave this one cached.
+        article_cache.invalidate(2)
+        assert article_cache.get("item:1", article_cache.generation("item:1")) is not None
+
+        lists = article_cache.generation()
+        article_cache.set("list:a", response, lists)
+        article_cache.invalidate_lists()
+        # Entries from an older generation are never served.
+        assert article_cache.get("list:a", article_cache.generation()) is None
+
+
+def test_article_cache_backend_follows_worker_count(test_client):
+    app = test_client.application
+    try:
+        app.config["WORKER_PROCESSES"] = 4
+        article_cache.init_app(app)
+        assert article_cache.backend is None
+        app.config["WORKER_PROCESSES"] = 1
+        article_cache.init_app(app)
+        assert article_cache.backend is not None
+    finally:
+        app.config["WORKER_PROCESSES"] = 1
+        article_cache.init_app(app)
+
+
+def test_principal_invalidation_reaches_other_workers_by_expiry(
+    test_client, add_user, fake_redis, monkeypatch
+):
+    app = test_client.application
+    monkeypatch.setitem(app.config, "CACHE_REDIS_URL", "redis://fake")
+    # helpers.principals is also the name of the package's singleton.
+    module = importlib.import_module("helpers.principals")
+    monkeypatch.setattr(module, "redis_client", lambda url: fake_redis)
+    workers = [PrincipalCache(), PrincipalCache()]
+    for worker in workers:
+        worker.init_app(app)
+    assert (workers[0].cache.local.ttl, workers[0].cache.shared.ttl) == (5, 60)
+
+    with app.app_context():
+        for worker in workers:
+            assert worker.get(add_user.id).username == add_user.username
+        workers[0].invalidate(add_user.id)
+        assert workers[0].cache.get(str(add_user.id)) is None
+        # The other worker's own copy outlives the invalidation until it expires.
+        assert workers[1].cache.get(str(add_user.id)) is not None
+        now = time.monotonic()
+        monkeypatch.setattr("helpers.cache.time.monotonic", lambda: now + 6)
+        assert workers[1].cache.get(str(add_user.id)) is None
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, ForeignKey, Integer, MetaData, Table
+
+from models import db
+from scripts.check_indexes import check
+
+
+def test_models_match_schema(test_client):
+    with test_client.application.app_context():
+        assert check(db.metadata, db.engine) == []
+
+
+def test_reports_unindexed_foreign_key(test_client):
+    metadata = MetaData()
+    Table("users", metadata, Column("id", Integer, primary_key=True))
+    Table(
+        "articles",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer, ForeignKey("users.id"), index=True),
+        Column("title_id", Integer, ForeignKey("users.id")),
+    )
+    with test_client.application.app_context():
+        missing = check(metadata, db.engine)
+    assert [(m.table, m.columns) for m in missing] == [("articles", ["title_id"])]
@@ -0,0 +1,105 @@
+import gzip
+import json
+
+import pytest
+
+from helpers import get_token, metrics
+from helpers.compression import brotli
+
+
+def test_compresses_large_responses(test_client, add_user, add_article):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        headers = {"Authorization": f"Bearer {token}", "Accept-Encoding": "gzip"}
+        config = test_client.application.config
+
+        config["COMPRESS_MIN_SIZE"] = 1
+        try:
+            response = test_client.get("/articles", headers=headers)
+        finally:
+            config["COMPRESS_MIN_SIZE"] = 1024
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert isinstance(json.loads(gzip.decompress(response.data)), list)
+
+        response = test_client.get(f"/articles/{add_article.id}", headers=headers)
+        assert "Content-Encoding" not in response.headers
+        assert response.json["id"] == add_article.id
+
+
+def test_reuses_compressed_bytes_by_etag(test_client, add_user, add_article):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        headers = {"Authorization": f"Bearer {token}", "Accept-Encoding": "gzip"}
+        config = test_client.application.config
+
+        config["COMPRESS_MIN_SIZE"] = 1
+        try:
+            first = test_client.get(f"/articles/{add_article.id}", headers=headers)
+            hits = metrics.counter("compression.cache_hits")
+            second = test_client.get(f"/articles/{add_article.id}", headers=headers)
+        finally:
+            config["COMPRESS_MIN_SIZE"] = 1024
+        assert metrics.counter("compression.cache_hits") == hits + 1
+        assert second.data == first.data
+        assert json.loads(gzip.decompress(second.data))["id"] == add_article.id
+
+
+@pytest.mark.skipif(brotli is None, reason="brotli is not installed")
+def test_prefers_brotli(test_client, add_user):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        response = test_client.get(
+            "/articles/export",
+            headers={"Authorization": f"Bearer {token}", "Accept-Encoding": "gzip, br"},
+        )
+        assert response.headers["Content-Encoding"] == "br"
+        lines = brotli.decompress(response.data).decode().splitlines()
+        assert all("id" in json.loads(line) for line in lines)
+
+
+def test_export_opt_out_is_respected(test_client, add_user, add_article):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        headers = {"Authorization": f"Bearer {token}", "Accept-Encoding": "gzip, br"}
+        for fmt in ("ndjson", "csv"):
+            response = test_client.get(f"/articles/export?format={fmt}&gzip=0", headers=headers)
+            assert response.status_code == 200
+            assert "Content-Encoding" not in response.headers
+            assert "Test Article" in response.get_data(as_text=True)
+
+
+def test_etag_differs_per_encoding(test_client, add_user, add_article):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        auth = {"Authorization": f"Bearer {token}"}
+        url = f"/articles/{add_article.id}"
+        config = test_client.application.config
+
+        config["COMPRESS_MIN_SIZE"] = 1
+        try:
+            plain = test_client.get(url, headers={**auth, "Accept-Encoding": "identity"})
+            gzipped = test_client.get(url, headers={**auth, "Accept-Encoding": "gzip"})
+            assert gzipped.headers["Content-Encoding"] == "gzip"
+            assert gzipped.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+
+            response = test_client.get(
+                url,
+                headers={
+                    **auth,
+                    "Accept-Encoding": "gzip",
+                    "If-None-Match": gzipped.headers["ETag"],
+                },
+            )
+            assert response.status_code == 304
+            assert response.headers["ETag"] == gzipped.headers["ETag"]
+        finally:
+            config["COMPRESS_MIN_SIZE"] = 1024
+
+        # Either variant identifies the same version for If-Match.
+        response = test_client.put(
+            url,
+            json={"content": "Test Content"},
+            headers={**auth, "If-Match": gzipped.headers["ETag"]},
+        )
+        assert response.status_code == 200
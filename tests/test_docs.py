@@ -0,0 +1,16 @@
+from app import create_app
+
+
+def test_api_docs_modes():
+    app = create_app({"API_DOCS": "lazy"})
+    assert app.swag._template is None
+    response = app.test_client().get("/apispec_1.json")
+    assert response.status_code == 200
+    assert "/articles" in response.json["paths"]
+
+    eager = create_app({"API_DOCS": "eager"})
+    assert eager.swag.template is not None
+    assert eager.test_client().get("/apispec_1.json").json == response.json
+
+    app = create_app({"API_DOCS": "off"})
+    assert app.test_client().get("/apispec_1.json").status_code == 404
@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+
+from app import create_app
+from models import db, Article
+from helpers import get_token, assert_max_queries, article_cache, count_queries
+from helpers.instrumentation import _after_cursor_execute, _before_cursor_execute
+
+
+def test_get_articles_query_count(test_client, add_user, add_article, monkeypatch):
+    # Cache hits issue no queries; measure the query path itself.
+    monkeypatch.setattr(article_cache, "backend", None)
+    with test_client.application.app_context():
+        admin_user = add_user
+        token = get_token(test_client, admin_user)
+        headers = {"Authorization": f"Bearer {token}"}
+        extra = [
+            Article(title=f"Counted {i}", content="Counted", user_id=admin_user.id)
+            for i in range(5)
+        ]
+        db.session.add_all(extra)
+        db.session.commit()
+        test_client.get("/articles", headers=headers)
+
+        with assert_max_queries(1) as stats:
+            response = test_client.get("/articles", headers=headers)
+        assert response.status_code == 200
+        assert stats.count == 1
+
+        with assert_max_queries(1) as stats:
+            response = test_client.get(f"/articles/{add_article.id}", headers=headers)
+        assert response.status_code == 200
+        assert stats.count == 1
+
+        for article in extra:
+            db.session.delete(article)
+        db.session.commit()
+
+
+def test_server_timing_header(test_client, add_user):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+
+        response = test_client.get(
+            "/articles", headers={"Authorization": f"Bearer {token}"}
+        )
+
+        timing = response.headers["Server-Timing"]
+        assert timing.startswith("db;dur=")
+        assert "serialize;dur=" in timing
+        assert "total;dur=" in timing
+
+
+def test_get_users_query_count(test_client, add_user):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        headers = {"Authorization": f"Bearer {token}"}
+        test_client.get("/users", headers=headers)
+
+        # Role names come from the role registry, not a join or lazy loads.
+        with assert_max_queries(1):
+            response = test_client.get("/users?q=admin", headers=headers)
+        assert response.status_code == 200
+        assert all(u["role"] == "admin" for u in response.json)
+
+
+def test_query_counting_without_request_instrumentation():
+    event.remove(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.remove(Engine, "after_cursor_execute", _after_cursor_execute)
+    app = create_app({"REQUEST_INSTRUMENTATION": False})
+    with app.app_context(), count_queries() as stats:
+        db.session.execute(db.select(Article.id).limit(1)).all()
+    assert stats.count == 1
+
+
+def test_failed_queries_leave_nothing_on_the_connection(test_client):
+    with test_client.application.app_context():
+        with db.engine.connect() as conn:
+            for _ in range(3):
+                with pytest.raises(exc.OperationalError):
+                    conn.exec_driver_sql("SELECT * FROM no_such_table")
+                conn.rollback()
+            with count_queries() as stats:
+                conn.exec_driver_sql("SELECT 1")
+            assert stats.count == 1
+            assert "query_start" not in conn.info
@@ -0,0 +1,39 @@
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import pytest
+
+from helpers import JSONProvider
+from helpers.json_provider import orjson
+
+
+Row = namedtuple("Row", "id title version")
+
+
+def provider(app, backend):
+    app.config["JSON_BACKEND"] = backend
+    try:
+        return JSONProvider(app)
+    finally:
+        app.config["JSON_BACKEND"] = "auto"
+
+
+@pytest.mark.skipif(orjson is None, reason="orjson is not installed")
+def test_orjson_matches_stdlib(test_client):
+    app = test_client.application
+    fast, stdlib = provider(app, "orjson"), provider(app, "stdlib")
+    assert fast.fast and not stdlib.fast
+
+    obj = {"b": [1, 2.5, None], "a": "ü", "when": datetime(2024, 1, 2, tzinfo=timezone.utc)}
+    assert fast.loads(fast.dumps(obj)) == stdlib.loads(stdlib.dumps(obj))
+    assert list(fast.loads(fast.dumps(obj))) == ["a", "b", "when"]
+    assert fast.loads(fast.dumps(obj))["when"] == "Tue, 02 Jan 2024 00:00:00 GMT"
+
+
+def test_dump_rows(test_client):
+    app = test_client.application
+    rows = [Row(1, "One", 3), Row(2, "Two", 1)]
+    for backend in ("auto", "stdlib"):
+        body = provider(app, backend).dump_rows(rows, ("id", "title"))
+        assert isinstance(body, bytes)
+        assert app.json.loads(body) == [{"id": 1, "title": "One"}, {"id": 2, "title": "Two"}]
@@ -0,0 +1,34 @@
+from sqlalchemy.pool import NullPool
+
+from config import engine_options
+from helpers import get_token
+
+
+def test_get_metrics_as_admin(test_client, add_user):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+
+        response = test_client.get(
+            "/metrics", headers={"Authorization": f"Bearer {token}"}
+        )
+
+        assert response.status_code == 200
+        assert set(response.json) == {"counters", "timings", "gauges"}
+        assert "db.pool.checked_out" in response.json["gauges"]
+
+
+def test_engine_options_from_environment(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "20")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "0")
+    monkeypatch.setenv("DB_STATEMENT_TIMEOUT_MS", "5000")
+
+    options = engine_options("postgresql://u:p@db/app")
+
+    assert options["pool_size"] == 20
+    assert options["max_overflow"] == 0
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"] == {"options": "-c statement_timeout=5000"}
+    assert engine_options("sqlite:///app.db") == {}
+
+    monkeypatch.setenv("DB_PGBOUNCER", "true")
+    assert engine_options("postgresql://u:p@db/app") == {"poolclass": NullPool}
@@ -0,0 +1,148 @@
+import math
+import os
+
+import pytest
+
+from app import create_app
+from helpers import get_token, rate_limiter, admission
+from helpers.cache import redis_client
+from helpers.ratelimit import MemoryBuckets, RedisBuckets, TAKE_SCRIPT
+
+TEST_REDIS_URL = os.getenv("TEST_REDIS_URL")
+
+
+class ScriptedRedis:
+    """A redis client whose register_script runs TAKE_SCRIPT's steps in Python."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.ttls = {}
+
+    def register_script(self, script):
+        assert script == TAKE_SCRIPT
+        return self._take
+
+    def _take(self, keys, args):
+        capacity, rate, now, cost = (float(arg) for arg in args)
+        state = self.hashes.get(keys[0], {})
+        tokens = float(state.get("tokens", capacity))
+        ts = float(state.get("ts", now))
+        tokens = min(capacity, tokens + max(0, now - ts) * rate)
+        allowed = 0
+        if tokens >= cost:
+            tokens -= cost
+            allowed = 1
+        self.hashes[keys[0]] = {"tokens": str(tokens), "ts": str(now)}
+        self.ttls[keys[0]] = math.ceil(capacity / rate) + 1
+        return [allowed, str(tokens).encode()]
+
+
+def test_memory_buckets_refill():
+    buckets = MemoryBuckets()
+    assert buckets.take("k", 10, 1000.0, 10) == (True, 0)
+    allowed, _ = buckets.take("k", 10, 0.001, 5)
+    assert not allowed
+    assert buckets.take("other", 10, 0.001, 5) == (True, 5)
+
+
+def test_redis_buckets_refill(monkeypatch):
+    client = ScriptedRedis()
+    buckets = RedisBuckets(client)
+    monkeypatch.setattr("helpers.ratelimit.time.time", lambda: 1000.0)
+    assert buckets.take("user:1", 10, 2.0, 10) == (True, 0.0)
+    assert buckets.take("user:1", 10, 2.0, 1) == (False, 0.0)
+    assert client.ttls["ratelimit:user:1"] == 6
+
+    monkeypatch.setattr("helpers.ratelimit.time.time", lambda: 1001.5)
+    assert buckets.take("user:1", 10, 2.0, 1) == (True, 2.0)
+    assert buckets.take("user:2", 10, 2.0, 1) == (True, 9.0)
+
+
+def test_failing_backend_lets_requests_through(test_client, monkeypatch):
+    class BrokenRedis(ScriptedRedis):
+        def _take(self, keys, args):
+            raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(rate_limiter, "buckets", RedisBuckets(BrokenRedis()))
+    response = test_client.post("/login", json={})
+    assert response.status_code == 400
+    assert "RateLimit-Limit" not in response.headers
+
+
+@pytest.mark.skipif(TEST_REDIS_URL is None, reason="TEST_REDIS_URL is not set")
+def test_take_script_on_redis():
+    client = redis_client(TEST_REDIS_URL)
+    buckets = RedisBuckets(client, prefix="test-ratelimit:")
+    client.delete("test-ratelimit:k")
+    try:
+        assert buckets.take("k", 10, 0.001, 10)[0]
+        allowed, tokens = buckets.take("k", 10, 0.001, 5)
+        assert not allowed and tokens < 5
+        assert 0 < client.ttl("test-ratelimit:k") <= 10001
+    finally:
+        client.delete("test-ratelimit:k")
+
+
+def test_bulk_is_charged_per_operation(test_client, add_user, monkeypatch):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+    headers = {"Authorization": f"Bearer {token}"}
+    monkeypatch.setattr(rate_limiter, "buckets", MemoryBuckets())
+    monkeypatch.setitem(rate_limiter.policies, "user", (30, 0.001))
+
+    operations = [{"op": "create", "title": f"Bulk {i}", "content": "x"} for i in range(5)]
+    response = test_client.post("/articles/bulk", json=operations, headers=headers)
+    assert response.headers["RateLimit-Remaining"] == "20"
+    # Capped at a full bucket, which 20 tokens are not.
+    response = test_client.post("/articles/bulk", json=operations * 3, headers=headers)
+    assert response.status_code == 429
+
+
+def test_login_is_limited_per_ip(test_client, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "buckets", MemoryBuckets())
+    monkeypatch.setitem(rate_limiter.policies, "ip", (2, 0.01))
+
+    for remaining in (1, 0):
+        response = test_client.post("/login", json={})
+        assert response.status_code == 400
+        assert response.headers["RateLimit-Limit"] == "2"
+        assert response.headers["RateLimit-Remaining"] == str(remaining)
+
+    response = test_client.post("/login", json={})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+    response = test_client.post("/login", json={}, environ_base={"REMOTE_ADDR": "10.0.0.2"})
+    assert response.status_code == 400
+
+
+def test_routes_charge_their_cost(test_client, add_user, monkeypatch):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+    headers = {"Authorization": f"Bearer {token}"}
+    monkeypatch.setattr(rate_limiter, "buckets", MemoryBuckets())
+    monkeypatch.setitem(rate_limiter.policies, "user", (12, 0.001))
+
+    response = test_client.get("/users?q=admin", headers=headers)  # search: 10
+    assert response.headers["RateLimit-Remaining"] == "2"
+    response = test_client.get(f"/users/{add_user.id}", headers=headers)  # get: 1
+    assert response.status_code == 200
+    assert response.headers["RateLimit-Remaining"] == "1"
+    response = test_client.get("/users", headers=headers)  # list: 5
+    assert response.status_code == 429
+    assert response.json["error"] == "Too many requests"
+
+
+def test_admission_sheds_load_with_503(test_client):
+    app = create_app({"ADMISSION_MAX_CONCURRENT": 1, "ADMISSION_WAIT": 0.01})
+    client = app.test_client()
+    try:
+        assert client.get("/articles").status_code == 403  # admitted, then unauthorized
+        assert admission.in_flight == 0
+
+        admission._slots.acquire()  # a request in flight
+        response = client.get("/articles")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        admission._slots.release()
+    finally:
+        admission.init_app(test_client.application)
@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from helpers import get_token, replicas, article_cache, metrics
+from helpers.cache import LocalCache
+from models import db
+
+
+@pytest.fixture
+def replica_app(test_client, add_user):
+    # The "replica" is the test database itself, reached through its own bind.
+    url = test_client.application.config["SQLALCHEMY_DATABASE_URI"]
+    app = create_app({"SQLALCHEMY_BINDS": {"replica_0": url}, "ARTICLE_CACHE_BACKEND": "none"})
+    statements = []
+    with app.app_context():
+        event.listen(
+            db.engines["replica_0"],
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement),
+        )
+    yield app, statements
+    with app.app_context():
+        db.engines["replica_0"].dispose()
+    # create_app reconfigured the shared router; restore the test app's.
+    replicas.init_app(test_client.application)
+
+
+def test_reads_go_to_replica_until_a_write(replica_app, add_user):
+    app, statements = replica_app
+    client = app.test_client()
+    with app.app_context():
+        token = get_token(client, add_user)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/articles", headers=headers).status_code == 200
+    assert any("FROM articles" in s for s in statements)
+
+    response = client.post(
+        "/articles", json={"title": "Replica", "content": "Replica"}, headers=headers
+    )
+    article_id = response.json["id"]
+    statements.clear()
+    # Read-your-writes: the author stays on the primary for the window.
+    response = client.get(f"/articles/{article_id}", headers=headers)
+    assert response.status_code == 200
+    assert statements == []
+
+    replicas.recent_writes.clear()
+    client.get(f"/articles/{article_id}", headers=headers)
+    assert statements
+    client.delete(f"/articles/{article_id}", headers=headers)
+
+
+def test_unhealthy_replica_falls_back_to_primary(replica_app, add_user):
+    app, statements = replica_app
+    client = app.test_client()
+    with app.app_context():
+        token = get_token(client, add_user)
+    replicas._set_health("replica_0", False)
+
+    response = client.get("/users", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert statements == []
+
+
+def test_login_does_not_hold_off_the_cache(replica_app, add_user, add_article, monkeypatch):
+    app, statements = replica_app
+    client = app.test_client()
+    monkeypatch.setattr(article_cache, "backend", LocalCache())
+    replicas.recent_writes.clear()
+    with app.app_context():
+        token = get_token(client, add_user)
+    assert replicas.recent_writes.get("last") is None
+
+    headers = {"Authorization": f"Bearer {token}"}
+    url = f"/articles/{add_article.id}"
+    assert client.get(url, headers=headers).status_code == 200
+    hits = metrics.counter("cache.article.hits")
+    assert client.get(url, headers=headers).status_code == 200
+    assert metrics.counter("cache.article.hits") == hits + 1
@@ -0,0 +1,46 @@
+import os
+import runpy
+
+import pytest
+
+from helpers.serving import resolve_server_mode
+
+
+def test_server_mode(test_client):
+    app = test_client.application
+    assert app.config["SERVER_MODE"] == "sync"
+
+    app.config["SERVER_MODE"] = "gevent"
+    try:
+        # Without a gevent worker nothing is patched, so requests would block.
+        with pytest.raises(RuntimeError):
+            resolve_server_mode(app)
+    finally:
+        app.config["SERVER_MODE"] = "sync"
+
+
+def load_gunicorn_config(monkeypatch, **env):
+    monkeypatch.delenv("DB_POOL_SIZE", raising=False)
+    monkeypatch.delenv("GEVENT_WORKER_CONNECTIONS", raising=False)
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.delenv("CHANGES_MAX_WAITERS", raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(f"GUNICORN_{name}", value)
+    return runpy.run_path(os.path.join(os.path.dirname(__file__), "..", "gunicorn.conf.py"))
+
+
+def test_gunicorn_config(monkeypatch):
+    config = load_gunicorn_config(monkeypatch, THREADS="8", WORKERS="3")
+    assert config["worker_class"] == "gthread"
+    assert (config["workers"], config["threads"]) == (3, 8)
+    assert config["preload_app"]
+    assert os.environ["DB_POOL_SIZE"] == "8"
+    assert os.environ["WEB_CONCURRENCY"] == "3"
+    assert os.environ["CHANGES_MAX_WAITERS"] == "4"
+
+    # gevent patches the standard library only after the fork.
+    config = load_gunicorn_config(monkeypatch, WORKER_CLASS="gevent", WORKER_CONNECTIONS="50")
+    assert not config["preload_app"]
+    assert config["threads"] == 1
+    assert os.environ["GEVENT_WORKER_CONNECTIONS"] == "50"
+    assert os.environ["CHANGES_MAX_WAITERS"] == "25"
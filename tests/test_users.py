@@ -1,7 +1,9 @@
+from datetime import datetime, timezone
+
 from werkzeug.security import generate_password_hash
 
-from models import db, User
-from helpers import get_token
+from models import db, User, Role, Article, ArticleChange
+from helpers import get_token, roles
 
 
 def test_get_users_as_admin(test_client, add_user):
@@ -134,3 +136,144 @@ def test_delete_user_as_admin(test_client, add_user):
 
         deleted_user = db.session.get(User, user_to_delete.id)
         assert deleted_user is None
+
+
+def test_get_users_page_size_is_capped(test_client, add_user):
+    with test_client.application.app_context():
+        admin_user = add_user
+        token = get_token(test_client, admin_user)
+        test_client.application.config["PAGE_SIZE_MAX"] = 1
+
+        response = test_client.get(
+            "/users?limit=1000", headers={"Authorization": f"Bearer {token}"}
+        )
+        test_client.application.config["PAGE_SIZE_MAX"] = 100
+
+        assert response.status_code == 200
+        assert len(response.json) == 1
+        if "X-Next-Cursor" in response.headers:
+            assert 'rel="next"' in response.headers["Link"]
+
+
+def test_deleted_user_token_is_rejected(test_client, add_user):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+
+        doomed = User(
+            username="doomed_user",
+            password=generate_password_hash("adminpass"),
+            role_id=1,
+        )
+        db.session.add(doomed)
+        db.session.commit()
+        doomed_token = get_token(test_client, doomed)
+
+        response = test_client.get(
+            "/articles", headers={"Authorization": f"Bearer {doomed_token}"}
+        )
+        assert response.status_code == 200
+
+        response = test_client.delete(
+            f"/users/{doomed.id}", headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 200
+
+        response = test_client.get(
+            "/articles", headers={"Authorization": f"Bearer {doomed_token}"}
+        )
+        assert response.status_code == 403
+        assert response.json["error"] == "Token has been revoked"
+
+
+def test_delete_user_deletes_their_articles(test_client, add_user):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        author = User(
+            username="author_to_delete",
+            password=generate_password_hash("adminpass"),
+            role_id=add_user.role_id,
+        )
+        author.articles.append(Article(title="Orphan", content="Orphan"))
+        db.session.add(author)
+        db.session.commit()
+        article_id = author.articles[0].id
+        headers = {"Authorization": f"Bearer {token}"}
+        assert test_client.get(f"/articles/{article_id}", headers=headers).status_code == 200
+        since = db.session.query(db.func.max(ArticleChange.seq)).scalar()
+
+        response = test_client.delete(f"/users/{author.id}", headers=headers)
+        assert response.status_code == 200
+        db.session.expire_all()
+        assert db.session.get(Article, article_id) is None
+        # Deleted by the database, but still logged and evicted from the cache.
+        changes = db.session.query(ArticleChange.article_id, ArticleChange.op).filter(
+            ArticleChange.seq > since
+        )
+        assert changes.all() == [(article_id, "delete")]
+        assert test_client.get(f"/articles/{article_id}", headers=headers).status_code == 404
+
+
+def test_rename_user_logs_their_articles(test_client, add_user):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        headers = {"Authorization": f"Bearer {token}"}
+        author = User(
+            username="author_to_rename",
+            password=generate_password_hash("adminpass"),
+            role_id=add_user.role_id,
+        )
+        long_ago = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        author.articles.extend(
+            Article(title=f"Renamed {i}", content="x", updated_at=long_ago) for i in range(2)
+        )
+        db.session.add(author)
+        db.session.commit()
+        article_ids = sorted(article.id for article in author.articles)
+        since = db.session.query(db.func.max(ArticleChange.seq)).scalar()
+        url = f"/articles/{article_ids[0]}"
+        last_modified = test_client.get(url, headers=headers).headers["Last-Modified"]
+
+        response = test_client.put(
+            f"/users/{author.id}", json={"username": "author_renamed"}, headers=headers
+        )
+        assert response.status_code == 200
+        response = test_client.get(f"/articles/changes?since={since}", headers=headers)
+        changes = response.json["changes"]
+        assert sorted(c["id"] for c in changes) == article_ids
+        assert {c["op"] for c in changes} == {"update"}
+        assert {c["article"]["author"] for c in changes} == {"author_renamed"}
+        # The articles' Last-Modified moves too, so date-only revalidation sees the rename.
+        response = test_client.get(url, headers={**headers, "If-Modified-Since": last_modified})
+        assert response.status_code == 200
+        assert response.json["author"] == "author_renamed"
+
+        db.session.delete(db.session.get(User, author.id))
+        db.session.commit()
+
+
+def test_update_user_rejects_unknown_role(test_client, add_user):
+    with test_client.application.app_context():
+        token = get_token(test_client, add_user)
+        response = test_client.put(
+            f"/users/{add_user.id}",
+            json={"role": "superuser"},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.status_code == 400
+        assert response.json["error"] == "Invalid role"
+
+
+def test_role_registry_follows_role_changes(test_client, add_user):
+    with test_client.application.app_context():
+        assert roles.name(add_user.role_id) == "admin"
+        assert roles.id("auditor") is None
+
+        role = Role(name="auditor")
+        db.session.add(role)
+        db.session.commit()
+        assert roles.id("auditor") == role.id
+
+        role.name = "reviewer"
+        db.session.commit()
+        assert roles.name(role.id) == "reviewer"
+        assert roles.id("auditor") is None